@@ -6,6 +6,21 @@ __all__ = [
     "entities",
     "map",
     "ai",
+    "simulation",
     "game",
+    "batch",
+    "replay",
+    "snapshot",
+    "profiler",
+    "pathbench",
+    "hpa",
+    "events",
+    "scheduler",
+    "planner",
+    "npgrid",
+    "netproto",
+    "server",
+    "netload",
+    "env",
     "renderer_tk",
 ]
@@ -1,5 +1,7 @@
 import heapq
-from typing import Optional, List, Tuple, Set, Dict
+from array import array
+from collections import deque, OrderedDict
+from typing import Callable, Optional, List, Tuple, Set, Dict
 from .map import GameMap
 from .utils import manhattan, neighbors
 
@@ -11,6 +13,7 @@ def a_star(game_map: GameMap, start: Tuple[int,int], goal: Tuple[int,int], forbi
     came: Dict[Tuple[int,int], Tuple[int,int]] = {}
     gscore = {start: 0}
     closed = set()
+    w, h, walk = game_map.w, game_map.h, game_map.walk
     while openh:
         f,g,current = heapq.heappop(openh)
         if current in closed:
@@ -26,14 +29,216 @@ def a_star(game_map: GameMap, start: Tuple[int,int], goal: Tuple[int,int], forbi
         closed.add(current)
         x,y = current
         for nx,ny in neighbors(current):
-            if not game_map.in_bounds(nx,ny): continue
+            if not (0 <= nx < w and 0 <= ny < h): continue
             if (nx,ny) in forbidden: continue
-            tile = game_map.grid[ny][nx]
-            if tile.ttype != 0: continue
-            if tile.bomb is not None: continue
+            if not walk[ny*w + nx]: continue
             tentative = g + 1
             if (nx,ny) not in gscore or tentative < gscore[(nx,ny)]:
                 gscore[(nx,ny)] = tentative
                 came[(nx,ny)] = current
                 heapq.heappush(openh, (tentative + manhattan((nx,ny), goal), tentative, (nx,ny)))
     return None
+
+class DistanceField:
+    """Reverse BFS distances from `goal` over walkable tiles.
+
+    Built once and shared by every mover heading to the same goal: `next_step`
+    reads a mover's next tile in O(1) and `path_from` walks the gradient.
+    `version` is the `GameMap.version` the field was built against. With
+    `max_dist` the search stops at that depth and `complete` is False if tiles
+    were left unexplored.
+    """
+    def __init__(self, game_map: GameMap, goal: Tuple[int,int], max_dist: Optional[int]=None):
+        self.map = game_map
+        self.goal = goal
+        self.version = game_map.version
+        w, h, walk = game_map.w, game_map.h, game_map.walk
+        self.dist = dist = array('i', [-1]) * (w * h)
+        gi = goal[1]*w + goal[0]
+        dist[gi] = 0
+        frontier = [gi]
+        d = 0
+        self.complete = True
+        while frontier:
+            if max_dist is not None and d >= max_dist:
+                self.complete = False
+                break
+            d += 1
+            nxt = []
+            for i in frontier:
+                x = i % w
+                if x + 1 < w and walk[i+1] and dist[i+1] < 0:
+                    dist[i+1] = d; nxt.append(i+1)
+                if x > 0 and walk[i-1] and dist[i-1] < 0:
+                    dist[i-1] = d; nxt.append(i-1)
+                if i + w < w*h and walk[i+w] and dist[i+w] < 0:
+                    dist[i+w] = d; nxt.append(i+w)
+                if i >= w and walk[i-w] and dist[i-w] < 0:
+                    dist[i-w] = d; nxt.append(i-w)
+            frontier = nxt
+
+    def distance(self, pos: Tuple[int,int]) -> int:
+        """Steps from `pos` to the goal, -1 if unreached."""
+        return self.dist[pos[1]*self.map.w + pos[0]]
+
+    def next_step(self, pos: Tuple[int,int]) -> Optional[Tuple[int,int]]:
+        """Walkable neighbour of `pos` closest to the goal, None if none is reached."""
+        w, h, walk, dist = self.map.w, self.map.h, self.map.walk, self.dist
+        x, y = pos
+        best = None
+        bestd = dist[y*w + x]
+        if bestd < 0:
+            bestd = 1 << 30   # e.g. standing on a bomb: any reached neighbour will do
+        for nx, ny in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)):
+            if not (0 <= nx < w and 0 <= ny < h): continue
+            j = ny*w + nx
+            d = dist[j]
+            if 0 <= d < bestd and walk[j]:
+                bestd = d
+                best = (nx, ny)
+        return best
+
+    def path_from(self, pos: Tuple[int,int]) -> Optional[List[Tuple[int,int]]]:
+        """Path from `pos` to the goal (excluding `pos`), None if unreachable."""
+        if pos == self.goal:
+            return []
+        path = []
+        cur = pos
+        while cur != self.goal:
+            cur = self.next_step(cur)
+            if cur is None:
+                return None
+            path.append(cur)
+        return path
+
+def nearest_bombing_spot(game_map: GameMap, start: Tuple[int,int], max_nodes: int=4000) -> Optional[Tuple[Tuple[int,int], List[Tuple[int,int]]]]:
+    """Closest walkable tile (by path length) next to a soft wall.
+
+    Bounded BFS over walkable tiles from `start`, expanding at most `max_nodes`
+    tiles. Returns `(spot, path)` where `path` leads from `start` to `spot`
+    (excluding `start`, empty if already there), or None if no spot was found.
+    """
+    search = BombingSpotSearch(game_map, start, max_nodes)
+    search.run()
+    return search.result
+
+class BombingSpotSearch:
+    """Resumable `nearest_bombing_spot`.
+
+    `run(nodes)` expands at most `nodes` more tiles and returns True once the
+    search is finished; `result` then holds `(spot, path)` or None. The frontier
+    is kept between calls, so a search can be spread over several ticks. Tiles
+    that change in the meantime are not revisited: callers should treat the
+    path as a hint and re-check walkability while following it.
+    """
+    __slots__ = ("map", "start", "max_nodes", "expanded", "done", "result", "_si", "_came", "_q")
+
+    def __init__(self, game_map: GameMap, start: Tuple[int,int], max_nodes: int=4000):
+        self.map = game_map
+        self.start = start
+        self.max_nodes = max_nodes
+        self.expanded = 0
+        self.result: Optional[Tuple[Tuple[int,int], List[Tuple[int,int]]]] = None
+        self.done = not game_map.soft_cells
+        self._si = si = start[1]*game_map.w + start[0]
+        self._came: Dict[int, int] = {si: -1}
+        self._q = deque([si])
+
+    def run(self, nodes: Optional[int]=None) -> bool:
+        if self.done:
+            return True
+        m = self.map
+        w, h, walk, tiles = m.w, m.h, m.walk, m.tiles
+        came, q, si = self._came, self._q, self._si
+        limit = self.max_nodes if nodes is None else min(self.max_nodes, self.expanded + nodes)
+        expanded = self.expanded
+        while q and expanded < limit:
+            i = q.popleft()
+            expanded += 1
+            x = i % w
+            if ((x + 1 < w and tiles[i+1] == 1) or (x > 0 and tiles[i-1] == 1)
+                    or (i + w < w*h and tiles[i+w] == 1) or (i >= w and tiles[i-w] == 1)):
+                path = []
+                j = i
+                while j != si:
+                    path.append((j % w, j // w))
+                    j = came[j]
+                path.reverse()
+                self.result = ((i % w, i // w), path)
+                self.expanded = expanded
+                self.done = True
+                return True
+            for j in (i+1 if x + 1 < w else -1, i-1 if x > 0 else -1, i+w if i + w < w*h else -1, i-w if i >= w else -1):
+                if j < 0 or j in came or not walk[j]: continue
+                came[j] = i
+                q.append(j)
+        self.expanded = expanded
+        self.done = not q or expanded >= self.max_nodes
+        return self.done
+
+class PathCache:
+    """LRU cache of path search results keyed on (start, goal, forbidden set).
+
+    Each entry remembers the `GameMap.version` it was computed or last checked
+    at. When the map has moved on, the entry is still served if none of the
+    cells changed since then lies on the path (a partial-validity check against
+    `GameMap.changed_since`); otherwise it is recomputed. A cached path can be
+    longer than optimal after a wall opens up elsewhere, never blocked.
+
+    Misses are computed by `search` (any function with `a_star`'s signature).
+
+    In the simulation, chasing bots read the shared `DistanceField` of their
+    target first; `Simulation.chase` only falls back to this cache when the
+    field, capped at `CHASE_FIELD_RADIUS`, does not reach the bot (long
+    detours on big maps). On small maps it is rarely consulted, so its
+    hit/miss counts describe those fallback queries only.
+    """
+    def __init__(self, capacity: int=256, search: Optional[Callable]=None):
+        self.capacity = capacity
+        self.search = search or a_star
+        self._entries: "OrderedDict[tuple, list]" = OrderedDict()  # key -> [version, path, cells]
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def find(self, game_map: GameMap, start: Tuple[int,int], goal: Tuple[int,int], forbidden: Set[Tuple[int,int]]=set()) -> Optional[List[Tuple[int,int]]]:
+        # the set itself, not its hash: colliding sets must not share an entry
+        key = (start, goal, frozenset(forbidden) if forbidden else None)
+        entry = self._entries.get(key)
+        if entry is not None:
+            version, path, cells = entry
+            if version == game_map.version:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return list(path) if path is not None else None
+            changed = game_map.changed_since(version)
+            # a missing path may have become reachable, so only found paths are revalidated
+            if changed is not None and path is not None and not cells.intersection(changed):
+                self.revalidated += 1
+                entry[0] = game_map.version
+                self._entries.move_to_end(key)
+                return list(path)
+        self.misses += 1
+        path = self.search(game_map, start, goal, forbidden)
+        w = game_map.w
+        cells = {y*w + x for (x,y) in path} if path else set()
+        self._entries[key] = [game_map.version, path, cells]
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return list(path) if path is not None else None
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
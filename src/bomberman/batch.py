@@ -0,0 +1,87 @@
+"""Batch runner: play many seeded headless matches across a process pool.
+
+Each match is a `Simulation` stepped on its virtual clock until at most one
+combatant is left or the tick limit is reached. Results are streamed to a JSONL
+file (one object per match) in completion order.
+
+Usage:
+    python3 -m bomberman.batch --matches 200 --workers 8 --out results.jsonl
+"""
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, Optional
+from . import config
+from .simulation import Simulation
+
+def play_match(seed:int, map_w:int=config.MAP_W, map_h:int=config.MAP_H, bot_count:int=config.BOT_COUNT, max_ticks:int=3000, players:int=0) -> Dict[str, Any]:
+    """Play one match to completion and return its summary."""
+    t0 = time.perf_counter()
+    sim = Simulation(map_w, map_h, bot_count=bot_count, map_seed=seed, seed=seed, player_count=players)
+    while sim.ticks < max_ticks and not sim.is_over():
+        sim.step(config.TICK_MS)
+    t1 = time.perf_counter()
+    alive = [e for e in sim.players + sim.bots if e.alive]
+    winner = alive[0] if len(alive) == 1 else None
+    return {
+        'seed': seed,
+        'winner': winner.id if winner else None,
+        'winner_kind': ('player' if winner in sim.players else 'bot') if winner else None,
+        'ticks': sim.ticks,
+        'sim_ms': sim.now,
+        'kills': {str(e.id): e.kills for e in sim.players + sim.bots},
+        'alive': [e.id for e in alive],
+        'soft_walls_destroyed': sim.soft_destroyed,
+        'wall_ms': (t1 - t0) * 1000.0,
+    }
+
+def run_batch(matches:int, workers:Optional[int]=None, base_seed:int=0, **match_kw) -> Iterator[Dict[str, Any]]:
+    """Yield match results as they finish; `workers=1` runs in-process.
+
+    `match_kw` is forwarded to `play_match` (map size, bot count, tick limit).
+    """
+    play = functools.partial(play_match, **match_kw)
+    seeds = range(base_seed, base_seed + matches)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for seed in seeds:
+            yield play(seed)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        for res in pool.imap_unordered(play, seeds, chunksize=1):
+            yield res
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run seeded headless bot matches in parallel.")
+    ap.add_argument("--matches", "-n", type=int, default=100)
+    ap.add_argument("--workers", "-j", type=int, default=None, help="worker processes (default: CPU count)")
+    ap.add_argument("--seed", type=int, default=0, help="seed of the first match; match i uses seed+i")
+    ap.add_argument("--map-w", type=int, default=config.MAP_W)
+    ap.add_argument("--map-h", type=int, default=config.MAP_H)
+    ap.add_argument("--bots", type=int, default=config.BOT_COUNT, help="bots per match (BOT_COUNT)")
+    ap.add_argument("--players", type=int, choices=(0, 1), default=0, help="include an idle player as a target")
+    ap.add_argument("--max-ticks", type=int, default=3000)
+    ap.add_argument("--out", "-o", default="-", help="JSONL output path ('-' for stdout)")
+    args = ap.parse_args(argv)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    t0 = time.perf_counter()
+    done = 0
+    try:
+        for res in run_batch(args.matches, args.workers, args.seed, map_w=args.map_w, map_h=args.map_h,
+                             bot_count=args.bots, max_ticks=args.max_ticks, players=args.players):
+            out.write(json.dumps(res) + "\n")
+            out.flush()
+            done += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    dt = time.perf_counter() - t0
+    print(f"{done} matches in {dt:.2f}s ({done / dt if dt else 0:.1f} matches/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
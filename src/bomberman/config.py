@@ -4,10 +4,15 @@ from typing import Final
 CELL: Final[int] = 36                 # pixels per tile
 MAP_W: Final[int] = 31                # width in tiles (odd nice)
 MAP_H: Final[int] = 17                # height in tiles
-WINDOW_W: Final[int] = MAP_W * CELL
-WINDOW_H: Final[int] = MAP_H * CELL + 64  # HUD area
+VIEW_W: Final[int] = 31               # tiles across the window at the default zoom
+VIEW_H: Final[int] = 17               # tiles down the window at the default zoom
+HUD_H: Final[int] = 64                # HUD strip below the map view (px)
+WINDOW_W: Final[int] = VIEW_W * CELL
+WINDOW_H: Final[int] = VIEW_H * CELL + HUD_H
 
 TICK_MS: Final[int] = 80              # game tick interval (ms)
+RENDER_MS: Final[int] = 16            # Tk loop pass interval (~60 Hz); passes with no changes skip drawing
+MAX_CATCH_UP_STEPS: Final[int] = 5    # steps one pass may run to catch up; older backlog is dropped
 BOMB_FUSE_MS: Final[int] = 2200       # bomb fuse in milliseconds
 EXPLOSION_MS: Final[int] = 550        # explosion lifetime in ms
 BOMB_POWER: Final[int] = 3
@@ -17,6 +22,18 @@ PLAYER_HEALTH: Final[int] = 3
 BOT_HEALTH: Final[int] = 1
 BOT_COUNT: Final[int] = 3
 BOT_VISION: Final[int] = 7
+BOT_DANGER_MS: Final[int] = 2000     # bots evade blasts due within this window
+CHASE_FIELD_RADIUS: Final[int] = 64  # depth of the shared BFS field chasing bots read
+SOFT_SEARCH_NODES: Final[int] = 4000 # tiles a searching bot may expand looking for a wall to bomb
+PATH_CACHE_SIZE: Final[int] = 256    # chase paths beyond CHASE_FIELD_RADIUS kept by Simulation.path_cache (LRU)
+HPA_MIN_CELLS: Final[int] = 65536    # maps this large fill the path cache with hierarchical search (hpa.py)
+AI_BUDGET_MS: Final[float] = 8.0     # per-tick bot thinking budget in the Tk game (headless runs are unbudgeted)
+AI_SLICE_NODES: Final[int] = 400     # tiles a resumable search expands between budget checks
+PLANNER_BUDGET_MS: Final[float] = 6.0   # wall-clock budget of one planner bot decision (fits in AI_BUDGET_MS)
+PLANNER_ROLLOUTS: Final[int] = 64       # rollouts per planner decision at most
+PLANNER_DEPTH: Final[int] = 10          # ticks simulated per rollout
+EVENT_LOG_SIZE: Final[int] = 256        # match events kept by Simulation.events (ring buffer)
+MSG_HISTORY: Final[int] = 5             # events shown as text by Simulation.msgs
 
 # ===== TILE TYPES =====
 EMPTY: Final[int] = 0
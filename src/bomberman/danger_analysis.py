@@ -0,0 +1,281 @@
+"""Danger analysis: a time-aware blast field with chain-reaction propagation.
+
+`DangerField` keeps, for every tile, the earliest simulation time (ms) at which
+a blast will reach it, taking chains into account: a bomb caught in another
+bomb's blast detonates at that bomb's (effective) time. The field is updated
+incrementally when a bomb is placed, when it explodes and when a soft wall is
+destroyed. Growth (new bombs, longer rays) is pushed forward from the changed
+bombs only; removals recompute the chain group around the removed bombs.
+Large batches (rebuilds, many rays reopened at once, danger queries over many
+covered tiles) use the NumPy paths in `npgrid` when it is available.
+"""
+import heapq
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from . import npgrid
+from .map import GameMap
+
+NEVER = 1 << 62
+
+class _BombInfo:
+    __slots__ = ("bomb", "idx", "fuse", "eff", "cells")
+
+    def __init__(self, bomb, idx:int):
+        self.bomb = bomb
+        self.idx = idx
+        self.fuse = bomb.explode_at
+        self.eff = bomb.explode_at   # effective detonation time (chains included)
+        self.cells: List[int] = []
+
+class DangerField:
+    def __init__(self, game_map:GameMap):
+        self.map = game_map
+        self.detonate_at = array('q', [NEVER]) * (game_map.w * game_map.h)
+        self._bombs: Dict[int, _BombInfo] = {}       # id(bomb) -> info
+        self._cover: Dict[int, Set[int]] = {}        # tile -> ids of bombs whose blast reaches it
+        self._on_tile: Dict[int, int] = {}           # tile -> id of bomb sitting on it
+
+    # -- updates -----------------------------------------------------------
+    def add_bomb(self, bomb):
+        key = id(bomb)
+        if key in self._bombs:
+            return
+        info = _BombInfo(bomb, bomb.y*self.map.w + bomb.x)
+        self._bombs[key] = info
+        self._on_tile[info.idx] = key
+        self._set_cells(key, info, self._blast_cells(bomb.x, bomb.y, bomb.power))
+        # a bomb already in a blast goes off with it
+        for k in self._cover.get(info.idx, ()):
+            if k != key and self._bombs[k].eff < info.eff:
+                info.eff = self._bombs[k].eff
+        self._propagate([key])
+
+    def add_bombs(self, bombs:Iterable):
+        """Add several bombs at once, propagating once; same result as `add_bomb` for each."""
+        infos = {}
+        for bomb in bombs:
+            key = id(bomb)
+            if key not in self._bombs and key not in infos:
+                infos[key] = _BombInfo(bomb, bomb.y*self.map.w + bomb.x)
+        if not infos:
+            return
+        self._bombs.update(infos)
+        for key, info in infos.items():
+            self._on_tile[info.idx] = key
+        for (key, info), cells in zip(infos.items(), self._blast_cells_many([i.bomb for i in infos.values()])):
+            self._set_cells(key, info, cells)
+        # bombs already covered by an older blast go off with it
+        for key, info in infos.items():
+            for k in self._cover.get(info.idx, ()):
+                if k not in infos and self._bombs[k].eff < info.eff:
+                    info.eff = self._bombs[k].eff
+        self._propagate(infos)
+
+    def remove_bomb(self, bomb):
+        """Forget a bomb that exploded (or was otherwise removed)."""
+        self.remove_bombs((bomb,))
+
+    def remove_bombs(self, bombs:Iterable):
+        """Forget several bombs at once, e.g. a whole chain, resolving once."""
+        touched: List[int] = []
+        linked: Set[int] = set()
+        removed: Set[int] = set()
+        for bomb in bombs:
+            key = id(bomb)
+            info = self._bombs.pop(key, None)
+            if info is None:
+                continue
+            removed.add(key)
+            if self._on_tile.get(info.idx) == key:
+                del self._on_tile[info.idx]
+            touched.extend(info.cells)
+            linked |= self._linked(info)
+            self._set_cells(key, info, [])
+        if removed:
+            self._resolve(linked - removed, touched)
+
+    def soft_destroyed(self, x:int, y:int):
+        """Extend the rays of bombs that were stopped by the wall at (x, y)."""
+        self.walls_destroyed(((x, y),))
+
+    def walls_destroyed(self, cells:Iterable[Tuple[int,int]]):
+        w = self.map.w
+        keys: Set[int] = set()
+        for (x, y) in cells:
+            keys.update(self._cover.get(y*w + x, ()))
+        infos = [self._bombs[key] for key in keys]
+        for key, info, cells in zip(keys, infos, self._blast_cells_many([i.bomb for i in infos])):
+            self._set_cells(key, info, cells)
+        if keys:
+            self._propagate(keys)
+
+    def rebuild(self, bombs:Iterable):
+        """Drop all state and re-add `bombs` (e.g. after restoring a snapshot)."""
+        for i in list(self._cover):
+            self.detonate_at[i] = NEVER
+        self._bombs.clear()
+        self._cover.clear()
+        self._on_tile.clear()
+        self.add_bombs(bombs)
+
+    # -- queries -----------------------------------------------------------
+    def time_at(self, x:int, y:int) -> int:
+        """Earliest detonation time reaching (x, y), or `NEVER`."""
+        return self.detonate_at[y*self.map.w + x]
+
+    def effective_time(self, bomb) -> int:
+        info = self._bombs.get(id(bomb))
+        return info.eff if info else NEVER
+
+    def danger_tiles(self, now:int, threshold_ms:int) -> Set[Tuple[int,int]]:
+        """Tiles that will be hit within `threshold_ms` of `now`."""
+        w = self.map.w
+        limit = now + threshold_ms
+        t = self.detonate_at
+        if npgrid.active(len(self._cover)) and t.itemsize == 8:
+            return npgrid.cells_at_or_before(t, limit, w)
+        return {(i % w, i // w) for i in self._cover if t[i] <= limit}
+
+    def escape_path(self, start:Tuple[int,int], now:int, step_ms:int, max_nodes:int=2000) -> Optional[List[Tuple[int,int]]]:
+        """Shortest walk from `start` to a tile no blast reaches.
+
+        A mover advancing one tile every `step_ms` must leave each tile on the
+        route before it detonates; tiles it would occupy when their blast
+        arrives are not expanded. Returns the path excluding `start` ([] if
+        `start` is already safe) or None if no timely escape was found.
+        """
+        m = self.map
+        w, h, walk, t = m.w, m.h, m.walk, self.detonate_at
+        si = start[1]*w + start[0]
+        if t[si] == NEVER:
+            return []
+        came: Dict[int, int] = {si: -1}
+        q = deque([(si, 0)])
+        expanded = 0
+        while q and expanded < max_nodes:
+            i, k = q.popleft()
+            expanded += 1
+            x, y = i % w, i // w
+            k1 = k + 1
+            arrive_by = now + k1 * step_ms
+            for nx, ny in ((x+1,y),(x-1,y),(x,y+1),(x,y-1)):
+                if not (0 <= nx < w and 0 <= ny < h): continue
+                j = ny*w + nx
+                if j in came or not walk[j]: continue
+                if t[j] <= arrive_by: continue   # blast would catch us there
+                came[j] = i
+                if t[j] == NEVER:
+                    path = []
+                    while j != si:
+                        path.append((j % w, j // w))
+                        j = came[j]
+                    path.reverse()
+                    return path
+                q.append((j, k1))
+        return None
+
+    # -- internals ---------------------------------------------------------
+    def _blast_cells(self, bx:int, by:int, power:int) -> List[int]:
+        m = self.map
+        w, h, tiles = m.w, m.h, m.tiles
+        cells = [by*w + bx]
+        for dx,dy in ((1,0),(-1,0),(0,1),(0,-1)):
+            for step in range(1, power+1):
+                nx = bx + dx*step
+                ny = by + dy*step
+                if not (0 <= nx < w and 0 <= ny < h): break
+                i = ny*w + nx
+                tt = tiles[i]
+                if tt == 2: break
+                cells.append(i)
+                if tt == 1: break
+        return cells
+
+    def _blast_cells_many(self, bombs:List) -> List[List[int]]:
+        if npgrid.active(len(bombs)):
+            m = self.map
+            return npgrid.blast_cells(m.tiles, m.w, m.h, [(b.x, b.y, b.power) for b in bombs])
+        return [self._blast_cells(b.x, b.y, b.power) for b in bombs]
+
+    def _set_cells(self, key:int, info:_BombInfo, cells:List[int]):
+        cover = self._cover
+        for i in info.cells:
+            s = cover.get(i)
+            if s is not None:
+                s.discard(key)
+                if not s:
+                    del cover[i]
+                    self.detonate_at[i] = NEVER
+        info.cells = cells
+        for i in cells:
+            cover.setdefault(i, set()).add(key)
+
+    def _linked(self, info:_BombInfo) -> Set[int]:
+        """Bombs chained to `info`: the ones its blast reaches and the ones reaching it."""
+        linked = set(self._cover.get(info.idx, ()))
+        for i in info.cells:
+            k = self._on_tile.get(i)
+            if k is not None:
+                linked.add(k)
+        return linked
+
+    def _propagate(self, keys:Iterable[int]):
+        """Push the times of `keys` along their blasts after coverage grew.
+
+        Adding a bomb or lengthening a ray can only make tiles and chained
+        bombs go off earlier, so a decrease-only Dijkstra from the changed
+        bombs is exact and touches nothing else.
+        """
+        bombs, on_tile, t = self._bombs, self._on_tile, self.detonate_at
+        heap = [(bombs[k].eff, k) for k in keys]
+        heapq.heapify(heap)
+        while heap:
+            eff, k = heapq.heappop(heap)
+            info = bombs[k]
+            if eff > info.eff: continue
+            for i in info.cells:
+                if eff < t[i]:
+                    t[i] = eff
+                k2 = on_tile.get(i)
+                if k2 is not None and k2 != k and eff < bombs[k2].eff:
+                    bombs[k2].eff = eff
+                    heapq.heappush(heap, (eff, k2))
+
+    def _resolve(self, seeds:Iterable[int], extra_cells:Iterable[int]=()):
+        bombs = self._bombs
+        # chain group reachable from the seeds
+        group: Set[int] = set()
+        stack = [k for k in seeds if k in bombs]
+        while stack:
+            k = stack.pop()
+            if k in group: continue
+            group.add(k)
+            for k2 in self._linked(bombs[k]):
+                if k2 not in group:
+                    stack.append(k2)
+        # earliest detonation inside the group (Dijkstra over trigger edges)
+        heap = []
+        for k in group:
+            info = bombs[k]
+            info.eff = info.fuse
+            heapq.heappush(heap, (info.eff, k))
+        while heap:
+            eff, k = heapq.heappop(heap)
+            info = bombs[k]
+            if eff > info.eff: continue
+            for i in info.cells:
+                k2 = self._on_tile.get(i)
+                if k2 is None or k2 == k: continue
+                other = bombs[k2]
+                if eff < other.eff:
+                    other.eff = eff
+                    heapq.heappush(heap, (eff, k2))
+        # rewrite the tiles the group (or a removed bomb) covered
+        cells = set(extra_cells)
+        for k in group:
+            cells.update(bombs[k].cells)
+        cover, t = self._cover, self.detonate_at
+        for i in cells:
+            s = cover.get(i)
+            t[i] = min(bombs[k].eff for k in s) if s else NEVER
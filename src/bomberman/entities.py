@@ -24,6 +24,7 @@ class Bomberman(Entity):
     bombs_active: int = 0
     alive: bool = True
     score: int = 0
+    kills: int = 0
 
     def can_place(self) -> bool:
         return self.alive and self.bombs_active < self.max_bombs
@@ -0,0 +1,324 @@
+"""Gym-style training environments (requires NumPy).
+
+`BombermanEnv` is one match: the agent drives `players[0]` of a headless
+`Simulation` against the built-in bots, one tick per `step`. `VectorEnv`
+runs a batch of them in-process; `SubprocVectorEnv` spreads the batch over
+worker processes that write into shared memory.
+
+Observations are float32 tensors of shape (CHANNELS, map_h, map_w):
+
+    0 hard wall     1 soft wall     2 bomb fuse left (fraction of BOMB_FUSE_MS, on bomb cells)
+    3 danger        (1 when a blast reaches the cell now, falling to 0 one fuse or more ahead)
+    4 explosion     5 self          6 opponents (other players and bots)   7 power-up
+
+They are written straight into preallocated arrays, from NumPy views of the
+map planes and the danger field, so stepping allocates no observation
+memory. `step` returns those same buffers (obs, rewards, terminated,
+truncated): copy them if they must outlive the next call. A finished env is
+reset automatically; the returned observation is then the first one of the
+new episode and `infos` maps its index to the final episode stats.
+
+Actions: 0 wait, 1 up, 2 down, 3 left, 4 right, 5 bomb.
+Rewards: `KILL_REWARD` per kill, `DEATH_REWARD` when the agent dies and
+`WIN_REWARD` when it is the last one standing.
+
+Benchmark:
+    python3 -m bomberman.env --envs 32 --steps 2000
+    python3 -m bomberman.env --envs 32 --steps 2000 --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import random
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+from . import config
+from .simulation import Simulation
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHANNELS = 8
+ACTIONS: Tuple[Tuple[int, int, bool], ...] = ((0, 0, False), (0, -1, False), (0, 1, False), (-1, 0, False), (1, 0, False), (0, 0, True))
+KILL_REWARD = 1.0
+DEATH_REWARD = -1.0
+WIN_REWARD = 1.0
+
+def _seed_list(seed:int, n:int) -> List[int]:
+    """Per-env seeds of a batch seeded with `seed` (the same in- and out-of-process)."""
+    rng = random.Random(seed)
+    return [rng.randrange(1 << 31) for _ in range(n)]
+
+def _need_numpy():
+    if np is None:
+        raise ImportError("bomberman.env needs numpy (pip install numpy)")
+
+class BombermanEnv:
+    """One match; `obs` is the (CHANNELS, h, w) float32 array to write observations into."""
+    def __init__(self, map_w:int=config.MAP_W, map_h:int=config.MAP_H, bot_count:int=config.BOT_COUNT,
+                 max_steps:int=3000, seed:Optional[int]=None, obs=None):
+        _need_numpy()
+        self.map_w, self.map_h = map_w, map_h
+        self.bot_count = bot_count
+        self.max_steps = max_steps
+        self.obs = obs if obs is not None else np.zeros((CHANNELS, map_h, map_w), dtype=np.float32)
+        self._tmp = np.empty((map_h, map_w), dtype=np.int64)
+        self._seeds = random.Random(seed)
+        self.sim: Optional[Simulation] = None
+        self.episode_return = 0.0
+
+    def reset(self, seed:Optional[int]=None):
+        if seed is None:
+            seed = self._seeds.randrange(1 << 31)
+        self.sim = sim = Simulation(self.map_w, self.map_h, bot_count=self.bot_count, map_seed=seed, seed=seed, player_count=1)
+        shape = (self.map_h, self.map_w)
+        # views onto the simulation's planes, valid for this episode
+        self._tiles = np.frombuffer(sim.map.tiles, dtype=np.uint8).reshape(shape)
+        self._explosion = np.frombuffer(sim.map.explosion, dtype=np.uint8).reshape(shape)
+        self._detonate = np.frombuffer(sim.danger.detonate_at, dtype=np.int64).reshape(shape)
+        self._kills = 0
+        self.episode_return = 0.0
+        self._observe()
+        return self.obs
+
+    def step(self, action:int) -> Tuple[float, bool, bool]:
+        """Apply `action` for one tick; returns (reward, terminated, truncated)."""
+        sim = self.sim
+        agent = sim.players[0]
+        inp = sim.inputs[0]
+        inp.dx, inp.dy, inp.bomb = ACTIONS[action]
+        sim.step(config.TICK_MS)
+        reward = KILL_REWARD * (agent.kills - self._kills)
+        self._kills = agent.kills
+        terminated = False
+        if not agent.alive:
+            reward += DEATH_REWARD
+            terminated = True
+        elif sim.is_over():
+            reward += WIN_REWARD
+            terminated = True
+        truncated = not terminated and sim.ticks >= self.max_steps
+        self.episode_return += reward
+        self._observe()
+        return reward, terminated, truncated
+
+    def episode_info(self) -> Dict[str, Any]:
+        sim = self.sim
+        agent = sim.players[0]
+        return {'return': self.episode_return, 'length': sim.ticks, 'kills': agent.kills,
+                'alive': agent.alive, 'seed': sim.seed}
+
+    def _observe(self):
+        sim, obs, tmp = self.sim, self.obs, self._tmp
+        np.equal(self._tiles, 2, out=obs[0])
+        np.equal(self._tiles, 1, out=obs[1])
+        fuse = obs[2]
+        fuse.fill(0.0)
+        now = sim.now
+        for b in sim.bombs:
+            fuse[b.y, b.x] = (b.explode_at - now) / config.BOMB_FUSE_MS
+        # danger: 1 - (time until the blast) / fuse, clipped; NEVER ends up at 0
+        np.subtract(self._detonate, now, out=tmp)
+        np.multiply(tmp, -1.0 / config.BOMB_FUSE_MS, out=obs[3], casting='unsafe')
+        np.add(obs[3], 1.0, out=obs[3])
+        np.clip(obs[3], 0.0, 1.0, out=obs[3])
+        np.not_equal(self._explosion, 0, out=obs[4])
+        me, others, pus = obs[5], obs[6], obs[7]
+        me.fill(0.0)
+        others.fill(0.0)
+        pus.fill(0.0)
+        agent = sim.players[0]
+        if agent.alive:
+            me[agent.y, agent.x] = 1.0
+        for e in sim.players[1:] + sim.bots:
+            if e.alive:
+                others[e.y, e.x] = 1.0
+        for pu in sim.powerups:
+            pus[pu.y, pu.x] = 1.0
+
+class VectorEnv:
+    """`num_envs` matches stepped together.
+
+    Buffers (obs, rewards, terminated, truncated) are allocated here unless
+    passed in (as `SubprocVectorEnv` workers do with shared memory).
+    """
+    def __init__(self, num_envs:int, map_w:int=config.MAP_W, map_h:int=config.MAP_H, bot_count:int=config.BOT_COUNT,
+                 max_steps:int=3000, seed:int=0, buffers:Optional[Tuple[Any, Any, Any, Any]]=None,
+                 env_seeds:Optional[List[int]]=None):
+        _need_numpy()
+        self.num_envs = num_envs
+        self.observation_shape = (CHANNELS, map_h, map_w)
+        self.num_actions = len(ACTIONS)
+        if buffers is None:
+            buffers = (np.zeros((num_envs,) + self.observation_shape, dtype=np.float32),
+                       np.zeros(num_envs, dtype=np.float32), np.zeros(num_envs, dtype=bool), np.zeros(num_envs, dtype=bool))
+        self.obs, self.rewards, self.terminated, self.truncated = buffers
+        env_seeds = env_seeds or _seed_list(seed, num_envs)
+        self.envs = [BombermanEnv(map_w, map_h, bot_count, max_steps, env_seeds[k], self.obs[k]) for k in range(num_envs)]
+
+    def reset(self, seed:Optional[int]=None, env_seeds:Optional[List[int]]=None):
+        """Reset every env (reseeding them from `seed` if given); returns (obs, infos)."""
+        if seed is not None:
+            env_seeds = _seed_list(seed, self.num_envs)
+        if env_seeds is not None:
+            for env, s in zip(self.envs, env_seeds):
+                env._seeds = random.Random(s)
+        for env in self.envs:
+            env.reset()
+        return self.obs, {}
+
+    def step(self, actions) -> Tuple[Any, Any, Any, Any, Dict[int, Dict[str, Any]]]:
+        infos: Dict[int, Dict[str, Any]] = {}
+        rewards, terminated, truncated = self.rewards, self.terminated, self.truncated
+        for k, env in enumerate(self.envs):
+            r, term, trunc = env.step(int(actions[k]))
+            rewards[k] = r
+            terminated[k] = term
+            truncated[k] = trunc
+            if term or trunc:
+                infos[k] = env.episode_info()
+                env.reset()
+        return self.obs, rewards, terminated, truncated, infos
+
+    def close(self):
+        pass
+
+def _worker(conn, names:Dict[str, str], num_envs:int, lo:int, hi:int, kwargs:Dict[str, Any]):
+    shms = {k: shared_memory.SharedMemory(name=v) for k, v in names.items()}
+    try:
+        shape = (num_envs, CHANNELS, kwargs['map_h'], kwargs['map_w'])
+        obs = np.ndarray(shape, dtype=np.float32, buffer=shms['obs'].buf)
+        actions = np.ndarray(num_envs, dtype=np.int64, buffer=shms['actions'].buf)
+        rewards = np.ndarray(num_envs, dtype=np.float32, buffer=shms['rewards'].buf)
+        terminated = np.ndarray(num_envs, dtype=bool, buffer=shms['terminated'].buf)
+        truncated = np.ndarray(num_envs, dtype=bool, buffer=shms['truncated'].buf)
+        vec = VectorEnv(hi - lo, buffers=(obs[lo:hi], rewards[lo:hi], terminated[lo:hi], truncated[lo:hi]), **kwargs)
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == 'step':
+                infos = vec.step(actions[lo:hi])[4]
+                conn.send({lo + k: v for k, v in infos.items()})
+            elif cmd == 'reset':
+                vec.reset(env_seeds=_seed_list(arg, num_envs)[lo:hi] if arg is not None else None)
+                conn.send(None)
+            elif cmd == 'close':
+                break
+        del obs, actions, rewards, terminated, truncated, vec
+    finally:
+        for shm in shms.values():
+            shm.close()
+        conn.close()
+
+class SubprocVectorEnv:
+    """`VectorEnv` split over `workers` processes sharing the batch buffers.
+
+    Actions are written into shared memory and every worker steps its slice
+    of envs in parallel; the returned arrays are views onto the same shared
+    buffers, so nothing is copied between processes but the small `infos`.
+    """
+    def __init__(self, num_envs:int, workers:Optional[int]=None, map_w:int=config.MAP_W, map_h:int=config.MAP_H,
+                 bot_count:int=config.BOT_COUNT, max_steps:int=3000, seed:int=0):
+        _need_numpy()
+        workers = max(1, min(num_envs, workers or mp.cpu_count()))
+        self.num_envs = num_envs
+        self.observation_shape = (CHANNELS, map_h, map_w)
+        self.num_actions = len(ACTIONS)
+        obs_bytes = num_envs * CHANNELS * map_h * map_w * 4
+        sizes = {'obs': obs_bytes, 'actions': num_envs * 8, 'rewards': num_envs * 4, 'terminated': num_envs, 'truncated': num_envs}
+        self._shms = {k: shared_memory.SharedMemory(create=True, size=max(1, n)) for k, n in sizes.items()}
+        self.obs = np.ndarray((num_envs,) + self.observation_shape, dtype=np.float32, buffer=self._shms['obs'].buf)
+        self.actions = np.ndarray(num_envs, dtype=np.int64, buffer=self._shms['actions'].buf)
+        self.rewards = np.ndarray(num_envs, dtype=np.float32, buffer=self._shms['rewards'].buf)
+        self.terminated = np.ndarray(num_envs, dtype=bool, buffer=self._shms['terminated'].buf)
+        self.truncated = np.ndarray(num_envs, dtype=bool, buffer=self._shms['truncated'].buf)
+        names = {k: shm.name for k, shm in self._shms.items()}
+        env_seeds = _seed_list(seed, num_envs)
+        self._conns = []
+        self._procs = []
+        bounds = [num_envs * k // workers for k in range(workers + 1)]
+        for lo, hi in zip(bounds, bounds[1:]):
+            parent, child = mp.Pipe()
+            kwargs = dict(map_w=map_w, map_h=map_h, bot_count=bot_count, max_steps=max_steps, env_seeds=env_seeds[lo:hi])
+            p = mp.Process(target=_worker, args=(child, names, num_envs, lo, hi, kwargs), daemon=True)
+            p.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(p)
+        self._closed = False
+
+    def reset(self, seed:Optional[int]=None):
+        for conn in self._conns:
+            conn.send(('reset', seed))
+        for conn in self._conns:
+            conn.recv()
+        return self.obs, {}
+
+    def step(self, actions):
+        self.actions[:] = actions
+        for conn in self._conns:
+            conn.send(('step', None))
+        infos: Dict[int, Dict[str, Any]] = {}
+        for conn in self._conns:
+            infos.update(conn.recv())
+        return self.obs, self.rewards, self.terminated, self.truncated, infos
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for conn in self._conns:
+            try:
+                conn.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for p in self._procs:
+            p.join(timeout=5)
+        del self.obs, self.actions, self.rewards, self.terminated, self.truncated
+        for shm in self._shms.values():
+            try:
+                shm.close()
+            except BufferError:   # the caller still holds a view; the mapping goes with it
+                pass
+            shm.unlink()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Step a batch of environments with random actions and report throughput.")
+    ap.add_argument("--envs", type=int, default=16)
+    ap.add_argument("--steps", type=int, default=1000)
+    ap.add_argument("--workers", type=int, default=0, help="worker processes (0 = in-process VectorEnv)")
+    ap.add_argument("--map-w", type=int, default=config.MAP_W)
+    ap.add_argument("--map-h", type=int, default=config.MAP_H)
+    ap.add_argument("--bots", type=int, default=config.BOT_COUNT)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    _need_numpy()
+    kw = dict(map_w=args.map_w, map_h=args.map_h, bot_count=args.bots, seed=args.seed)
+    vec = SubprocVectorEnv(args.envs, args.workers, **kw) if args.workers else VectorEnv(args.envs, **kw)
+    try:
+        vec.reset()
+        rng = np.random.default_rng(args.seed)
+        actions = np.zeros(args.envs, dtype=np.int64)
+        episodes: List[Dict[str, Any]] = []
+        t0 = time.perf_counter()
+        for _ in range(args.steps):
+            actions[:] = rng.integers(0, vec.num_actions, args.envs)
+            infos = vec.step(actions)[4]
+            episodes.extend(infos.values())
+        dt = time.perf_counter() - t0
+    finally:
+        vec.close()
+    n = args.steps * args.envs
+    mean_ret = sum(e['return'] for e in episodes) / len(episodes) if episodes else 0.0
+    print(f"{args.envs} envs x {args.steps} steps ({'%d workers' % args.workers if args.workers else 'in-process'}): "
+          f"{n / dt:.0f} env steps/s, {len(episodes)} episodes, mean return {mean_ret:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Typed match events and a bounded event log.
+
+The simulation publishes one small event tuple for each notable thing that
+happens:
+- a bomb placed;
+- walls destroyed;
+- a power-up spawned or collected;
+- a player hit;
+- an entity killed;
+- a front-end note (`Message`).
+
+It does not build a message string for any of these. Events go into an
+`EventLog`, a fixed-size ring buffer with optional subscribers. The log keeps
+the event type and its fields; the event tuple is only built for subscribers
+and readers, and its text only when something asks for it (`str(event)`,
+`EventLog.texts`). A headless or batch run with no subscriber pays for one
+call and a buffer slot per event. Entities are referred to by id, so events
+are cheap to keep, copy and send.
+
+Compare against building an f-string per event and trimming a list with
+`pop(0)`, and count the events of a headless match:
+    python3 -m bomberman.events --events 200000 --ticks 2000
+"""
+import argparse
+import json
+import time
+from collections import Counter, deque
+from typing import Callable, Deque, List, NamedTuple, Optional, Tuple, Union
+from . import config
+
+class BombPlaced(NamedTuple):
+    tick: int
+    owner: int
+    x: int
+    y: int
+
+    def __str__(self) -> str:
+        return f"Bomb placed by {self.owner} at {self.x},{self.y}"
+
+class WallsDestroyed(NamedTuple):
+    tick: int
+    count: int
+
+    def __str__(self) -> str:
+        return f"{self.count} soft wall(s) destroyed"
+
+class PowerUpSpawned(NamedTuple):
+    tick: int
+    type: str
+    x: int
+    y: int
+
+    def __str__(self) -> str:
+        return f"Power-up '{self.type}' spawned at {self.x},{self.y}"
+
+class PowerUpCollected(NamedTuple):
+    tick: int
+    entity: int
+    type: str
+
+    def __str__(self) -> str:
+        return f"Picked up {self.type.replace('_', ' ').title()}!"
+
+class EntityHit(NamedTuple):
+    """A player lost one health point."""
+    tick: int
+    entity: int
+    health: int    # left after the hit
+
+    def __str__(self) -> str:
+        return f"Player hit! HP {self.health}"
+
+class EntityKilled(NamedTuple):
+    tick: int
+    entity: int
+    killer: int    # owner of the bomb
+    player: bool
+
+    def __str__(self) -> str:
+        return "Player died!" if self.player else f"Bot {self.entity} killed by bomb"
+
+class Message(NamedTuple):
+    """Free text from a front-end (seed, profiler and path-viz notes)."""
+    tick: int
+    text: str
+
+    def __str__(self) -> str:
+        return self.text
+
+Event = Union[BombPlaced, WallsDestroyed, PowerUpSpawned, PowerUpCollected, EntityHit, EntityKilled, Message]
+
+class EventLog:
+    """The last `capacity` events, oldest first, plus subscribers called on each publish.
+
+    `published` counts every event published since the last `clear`, so a
+    reader can tell whether anything new arrived without building events.
+    """
+    def __init__(self, capacity:int=config.EVENT_LOG_SIZE):
+        self._events: Deque[Tuple[type, tuple]] = deque(maxlen=capacity)   # (event type, fields)
+        self.subscribers: List[Callable[[Event], None]] = []
+        self.published = 0
+
+    def __getstate__(self):
+        # subscribers belong to front-ends
+        state = self.__dict__.copy()
+        state['subscribers'] = []
+        return state
+
+    def publish(self, kind:type, *fields):
+        """Record the event `kind(*fields)`, e.g. `publish(BombPlaced, tick, owner, x, y)`."""
+        self._events.append((kind, fields))
+        self.published += 1
+        if self.subscribers:
+            event = kind._make(fields)
+            for fn in self.subscribers:
+                fn(event)
+
+    def subscribe(self, fn:Callable[[Event], None]):
+        self.subscribers.append(fn)
+
+    def unsubscribe(self, fn:Callable[[Event], None]):
+        try:
+            self.subscribers.remove(fn)
+        except ValueError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self):
+        return (kind._make(fields) for kind, fields in self._events)
+
+    @property
+    def last(self) -> Optional[Event]:
+        if not self._events:
+            return None
+        kind, fields = self._events[-1]
+        return kind._make(fields)
+
+    def recent(self, n:int) -> List[Event]:
+        """The last `n` events, oldest first."""
+        ev = self._events
+        return [ev[i][0]._make(ev[i][1]) for i in range(-min(n, len(ev)), 0)]
+
+    def texts(self, n:int) -> List[str]:
+        """Text of the last `n` events, oldest first."""
+        return [str(e) for e in self.recent(n)]
+
+    def clear(self):
+        self._events.clear()
+        self.published = 0
+
+def _bench_strings(n:int) -> float:
+    msgs: List[str] = []
+    t0 = time.perf_counter()
+    for i in range(n):
+        msgs.append(f"Bomb placed by {i & 7} at {i & 31},{i & 15}")
+        if len(msgs) > 5:
+            msgs.pop(0)
+    return (time.perf_counter() - t0) * 1e9 / n
+
+def _bench_events(n:int) -> float:
+    log = EventLog()
+    t0 = time.perf_counter()
+    for i in range(n):
+        log.publish(BombPlaced, i, i & 7, i & 31, i & 15)
+    return (time.perf_counter() - t0) * 1e9 / n
+
+def main(argv=None):
+    from .simulation import Simulation
+    ap = argparse.ArgumentParser(description="Measure event publishing and count the events of a headless match.")
+    ap.add_argument("--events", type=int, default=200000)
+    ap.add_argument("--ticks", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--map-w", type=int, default=config.MAP_W)
+    ap.add_argument("--map-h", type=int, default=config.MAP_H)
+    ap.add_argument("--bots", type=int, default=config.BOT_COUNT)
+    args = ap.parse_args(argv)
+
+    sim = Simulation(args.map_w, args.map_h, bot_count=args.bots, seed=args.seed)
+    kinds: Counter = Counter()
+    sim.events.subscribe(lambda e: kinds.update((type(e).__name__,)))
+    while sim.ticks < args.ticks and not sim.is_over():
+        sim.step(config.TICK_MS)
+    print(json.dumps({
+        'fstring_pop_ns': round(_bench_strings(args.events), 1),
+        'publish_ns': round(_bench_events(args.events), 1),
+        'match_ticks': sim.ticks,
+        'match_events': dict(kinds),
+        'hud': sim.msgs,
+    }))
+
+if __name__ == "__main__":
+    main()
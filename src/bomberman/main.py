@@ -1,12 +1,27 @@
+import argparse
 import tkinter as tk
+from . import config
 from .renderer_tk import TkRenderer
 from .game import Game
 
-def main():
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bomberman (Tkinter)")
+    ap.add_argument("--seed", type=int, default=None, help="RNG seed for bot spawns and decisions (default: random)")
+    ap.add_argument("--record", metavar="PATH", default=None, help="write a replay of the match to PATH on quit")
+    ap.add_argument("--profile", metavar="PATH", default=None, help="profile every tick and write the trace to PATH (.csv or .json) on quit")
+    ap.add_argument("--planner-bots", type=int, default=0, metavar="N", help="let the first N bots plan with rollouts instead of the state machine")
+    ap.add_argument("--map-w", type=int, default=config.MAP_W, help="map width in tiles (the view scrolls over larger maps)")
+    ap.add_argument("--map-h", type=int, default=config.MAP_H)
+    ap.add_argument("--bots", type=int, default=config.BOT_COUNT)
+    args = ap.parse_args(argv)
+    if args.planner_bots and args.record:
+        ap.error("--planner-bots cannot be recorded: replays do not store the planner")
+
     root = tk.Tk()
     root.title("Bomberman - Tkinter")
     renderer = TkRenderer(root)
-    game = Game(root, renderer)
+    game = Game(root, renderer, seed=args.seed, record=args.record, profile=args.profile, planners=args.planner_bots,
+                map_w=args.map_w, map_h=args.map_h, bot_count=args.bots)
     root.protocol("WM_DELETE_WINDOW", game.quit)
     root.mainloop()
 
@@ -1,55 +1,285 @@
 import random
-from typing import Optional, List
-from .entities import Tile
+from array import array
+from collections import deque
+from typing import Optional, List, Iterable, Tuple, Callable, Set
+from . import npgrid
 
 class GameMap:
-    def __init__(self, w:int, h:int, seed:Optional[int]=None):
+    """Tile map stored as flat planes indexed by `y*w + x`.
+
+    - `tiles`: tile type per cell (0 empty, 1 soft, 2 hard)
+    - `bomb_idx`: slot in `bomb_table` of the bomb on the cell, -1 if none
+    - `explosion`: number of live explosions covering the cell
+    - `walk`: 1 where the cell is empty and holds no bomb (derived, kept in sync)
+
+    `soft_cells` indexes the cells that still hold a soft wall.
+
+    `soft_density` is the chance that a free cell gets a soft wall. With
+    `generate=False` the map starts all empty (e.g. to restore a snapshot
+    into). Large maps are generated, and large explosion batches applied,
+    with NumPy when it is installed (see `npgrid`); the result is the same.
+
+    `grid[y][x]` still returns a `Tile`-like view for older callers; hot paths
+    should index the planes directly.
+
+    Callbacks registered with `add_listener` are called with `(x, y)` whenever a
+    cell's tile type, bomb or explosion coverage changes. `version` is bumped on
+    every change to walkability so derived data (distance fields, path caches)
+    can tell when it is stale; `changed_since` lists the cells behind recent
+    bumps.
+    """
+    CHANGE_LOG_SIZE = 4096
+
+    def __init__(self, w:int, h:int, seed:Optional[int]=None, generate:bool=True, soft_density:float=0.52):
         self.w = w
         self.h = h
-        self.grid: List[List[Tile]] = [[Tile() for _ in range(w)] for _ in range(h)]
-        self._generate(seed)
+        n = w * h
+        self.tiles = bytearray(n)
+        self.bomb_idx = array('i', [-1]) * n
+        self.explosion = bytearray(n)
+        self.walk = bytearray(b'\x01') * n
+        self.bomb_table: List[Optional[object]] = []
+        self._free_slots: List[int] = []
+        self.listeners: List[Callable[[int,int], None]] = []
+        self.version = 0
+        self._changes = deque(maxlen=self.CHANGE_LOG_SIZE)   # (version, cell)
+        self.soft_cells: Set[int] = set()
+        self.grid = GridView(self)
+        if generate:
+            self._generate(seed, soft_density)
 
-    def _generate(self, seed:Optional[int]):
+    def _generate(self, seed:Optional[int], soft_density:float=0.52):
         rng = random.Random(seed)
+        w, h = self.w, self.h
+        if npgrid.active(w*h, npgrid.MIN_CELLS):
+            self.tiles, self.walk, self.soft_cells = npgrid.generate(w, h, rng, soft_density)
+            return
+        tiles = self.tiles
         # border hard walls
-        for x in range(self.w):
-            self.grid[0][x].ttype = 2
-            self.grid[self.h-1][x].ttype = 2
-        for y in range(self.h):
-            self.grid[y][0].ttype = 2
-            self.grid[y][self.w-1].ttype = 2
+        tiles[0:w] = b'\x02' * w
+        tiles[(h-1)*w:h*w] = b'\x02' * w
+        for y in range(h):
+            tiles[y*w] = 2
+            tiles[y*w + w-1] = 2
         # checkered hard walls
-        for y in range(2, self.h-2):
-            for x in range(2, self.w-2):
-                if x % 2 == 0 and y % 2 == 0:
-                    self.grid[y][x].ttype = 2
+        for y in range(2, h-2, 2):
+            row = y*w
+            for x in range(2, w-2, 2):
+                tiles[row + x] = 2
         # soft walls random (leave starting area)
-        for y in range(1, self.h-1):
-            for x in range(1, self.w-1):
-                if self.grid[y][x].ttype != 0:
+        for y in range(1, h-1):
+            row = y*w
+            for x in range(1, w-1):
+                if tiles[row + x] != 0:
                     continue
-                if (x <= 2 and y <= 2) or (x >= self.w-3 and y >= self.h-3):
+                if (x <= 2 and y <= 2) or (x >= w-3 and y >= h-3):
                     continue
-                if rng.random() < 0.52:
-                    self.grid[y][x].ttype = 1
+                if rng.random() < soft_density:
+                    tiles[row + x] = 1
+        self.walk = bytearray(1 if t == 0 else 0 for t in tiles)
+        self.soft_cells = {i for i, t in enumerate(tiles) if t == 1}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['listeners'] = []
+        return state
+
+    def add_listener(self, fn:Callable[[int,int], None]):
+        self.listeners.append(fn)
+
+    def remove_listener(self, fn:Callable[[int,int], None]):
+        try:
+            self.listeners.remove(fn)
+        except ValueError:
+            pass
+
+    def _notify(self, x:int, y:int):
+        for fn in self.listeners:
+            fn(x, y)
+
+    def _notify_cells(self, cells:Iterable[int]):
+        if self.listeners:
+            w = self.w
+            for i in cells:
+                self._notify(i % w, i // w)
+
+    def changed_since(self, version:int) -> Optional[List[int]]:
+        """Cells whose walkability changed after `version`, None if the log no longer reaches back that far."""
+        if version == self.version:
+            return []
+        log = self._changes
+        if not log or log[0][0] > version + 1:
+            return None
+        cells = []
+        for v, i in reversed(log):
+            if v <= version:
+                break
+            cells.append(i)
+        return cells
+
+    def idx(self, x:int, y:int) -> int:
+        return y*self.w + x
 
     def in_bounds(self, x:int, y:int) -> bool:
         return 0 <= x < self.w and 0 <= y < self.h
 
+    def ttype(self, x:int, y:int) -> int:
+        return self.tiles[y*self.w + x]
+
     def is_walkable(self, x:int, y:int) -> bool:
-        if not self.in_bounds(x,y): return False
-        tile = self.grid[y][x]
-        if tile.ttype in (1, 2): return False
-        if tile.bomb is not None:
-            return False
-        return True
+        if not (0 <= x < self.w and 0 <= y < self.h): return False
+        return self.walk[y*self.w + x] == 1
+
+    def bomb_at(self, x:int, y:int) -> Optional[object]:
+        slot = self.bomb_idx[y*self.w + x]
+        return self.bomb_table[slot] if slot >= 0 else None
 
     def set_bomb(self, x:int, y:int, bomb:Optional[object]):
-        self.grid[y][x].bomb = bomb
+        i = y*self.w + x
+        slot = self.bomb_idx[i]
+        if slot >= 0:
+            self.bomb_table[slot] = None
+            self._free_slots.append(slot)
+            self.bomb_idx[i] = -1
+        if bomb is not None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self.bomb_table[slot] = bomb
+            else:
+                slot = len(self.bomb_table)
+                self.bomb_table.append(bomb)
+            self.bomb_idx[i] = slot
+        self.walk[i] = 1 if (self.tiles[i] == 0 and self.bomb_idx[i] < 0) else 0
+        self.version += 1
+        self._changes.append((self.version, i))
+        self._notify(x, y)
+
+    def set_ttype(self, x:int, y:int, ttype:int):
+        i = y*self.w + x
+        self.tiles[i] = ttype
+        if ttype == 1:
+            self.soft_cells.add(i)
+        else:
+            self.soft_cells.discard(i)
+        self.walk[i] = 1 if (ttype == 0 and self.bomb_idx[i] < 0) else 0
+        self.version += 1
+        self._changes.append((self.version, i))
+        self._notify(x, y)
 
     def destroy_soft(self, x:int, y:int) -> bool:
         if not self.in_bounds(x,y): return False
-        if self.grid[y][x].ttype == 1:
-            self.grid[y][x].ttype = 0
+        i = y*self.w + x
+        if self.tiles[i] == 1:
+            self.tiles[i] = 0
+            self.soft_cells.discard(i)
+            if self.bomb_idx[i] < 0:
+                self.walk[i] = 1
+            self.version += 1
+            self._changes.append((self.version, i))
+            self._notify(x, y)
             return True
         return False
+
+    def add_explosion(self, positions:Iterable[Tuple[int,int]]):
+        w, h, plane = self.w, self.h, self.explosion
+        if isinstance(positions, (list, set)) and npgrid.active(len(positions)):
+            self._notify_cells(npgrid.update_counts(plane, w, h, positions, 1))
+            return
+        for (x,y) in positions:
+            if 0 <= x < w and 0 <= y < h:
+                i = y*w + x
+                if plane[i] < 255:
+                    plane[i] += 1
+                    if plane[i] == 1:
+                        self._notify(x, y)
+
+    def clear_explosion(self, positions:Iterable[Tuple[int,int]]):
+        w, h, plane = self.w, self.h, self.explosion
+        if isinstance(positions, (list, set)) and npgrid.active(len(positions)):
+            self._notify_cells(npgrid.update_counts(plane, w, h, positions, -1))
+            return
+        for (x,y) in positions:
+            if 0 <= x < w and 0 <= y < h:
+                i = y*w + x
+                if plane[i]:
+                    plane[i] -= 1
+                    if plane[i] == 0:
+                        self._notify(x, y)
+
+
+class TileView:
+    """`Tile`-compatible proxy onto one cell of a `GameMap`'s planes."""
+    __slots__ = ("_map", "_i")
+
+    def __init__(self, game_map:GameMap, i:int):
+        self._map = game_map
+        self._i = i
+
+    @property
+    def ttype(self) -> int:
+        return self._map.tiles[self._i]
+
+    @ttype.setter
+    def ttype(self, value:int):
+        m = self._map
+        m.set_ttype(self._i % m.w, self._i // m.w, value)
+
+    @property
+    def bomb(self) -> Optional[object]:
+        slot = self._map.bomb_idx[self._i]
+        return self._map.bomb_table[slot] if slot >= 0 else None
+
+    @bomb.setter
+    def bomb(self, value:Optional[object]):
+        m = self._map
+        m.set_bomb(self._i % m.w, self._i // m.w, value)
+
+    @property
+    def in_explosion(self) -> bool:
+        return self._map.explosion[self._i] > 0
+
+    @in_explosion.setter
+    def in_explosion(self, value:bool):
+        m = self._map
+        m.explosion[self._i] = 1 if value else 0
+        m._notify(self._i % m.w, self._i // m.w)
+
+
+class GridView:
+    """Read/write `grid[y][x]` access over the flat planes."""
+    __slots__ = ("_map",)
+
+    def __init__(self, game_map:GameMap):
+        self._map = game_map
+
+    def __len__(self) -> int:
+        return self._map.h
+
+    def __getitem__(self, y:int) -> "RowView":
+        if not 0 <= y < self._map.h:
+            raise IndexError(y)
+        return RowView(self._map, y)
+
+    def __iter__(self):
+        for y in range(self._map.h):
+            yield RowView(self._map, y)
+
+
+class RowView:
+    __slots__ = ("_map", "_row")
+
+    def __init__(self, game_map:GameMap, y:int):
+        self._map = game_map
+        self._row = y * game_map.w
+
+    def __len__(self) -> int:
+        return self._map.w
+
+    def __getitem__(self, x:int) -> TileView:
+        if not 0 <= x < self._map.w:
+            raise IndexError(x)
+        return TileView(self._map, self._row + x)
+
+    def __iter__(self):
+        for x in range(self._map.w):
+            yield TileView(self._map, self._row + x)
@@ -0,0 +1,168 @@
+"""Load generator for the match server.
+
+Opens `--clients` connections from one process. Each client plays a random
+walk (changing direction now and then, sometimes dropping a bomb), sends one
+`I` frame per tick and reads the server's frames. Reported per run:
+
+- bytes received per tick, per client and over all clients (deltas only, and
+  the full states separately)
+- input latency: time from sending an input to receiving the first delta that
+  acknowledges it (so it includes up to one tick of waiting for the server)
+- how many clients were rejected or disconnected
+
+With `--mirror N` the first N clients also rebuild the match from the frames
+(`StateMirror`), to include client-side decoding in the measurement.
+
+Usage:
+    PYTHONPATH=src python3 -m bomberman.server --slots 300 --map-w 101 --map-h 101 &
+    PYTHONPATH=src python3 -m bomberman.netload --clients 300 --seconds 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+from .netproto import (StateMirror, frame, read_frame, INPUT, DELTA, WELCOME,
+                       MSG_INPUT, MSG_WELCOME, MSG_FULL, MSG_DELTA, MSG_ERROR)
+from .profiler import percentile
+from .simulation import PlayerInput
+
+DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1), (0, 0))
+
+class LoadStats:
+    def __init__(self):
+        self.connected = 0
+        self.rejected = 0
+        self.disconnected = 0
+        self.delta_frames = 0
+        self.delta_bytes = 0
+        self.full_frames = 0
+        self.full_bytes = 0
+        self.latencies: List[float] = []   # ms
+        self.tick_ms = 0
+
+    def summary(self, seconds:float) -> Dict[str, Any]:
+        """Totals and latency percentiles; per-tick rates are averaged over `seconds`."""
+        lat = sorted(self.latencies)
+        ticks = seconds * 1000.0 / self.tick_ms if self.tick_ms else 0
+        per_tick = self.delta_bytes / ticks if ticks else 0.0
+        return {
+            'clients': self.connected,
+            'rejected': self.rejected,
+            'disconnected': self.disconnected,
+            'seconds': round(seconds, 2),
+            'delta_frames': self.delta_frames,
+            'full_frames': self.full_frames,
+            'full_bytes': self.full_bytes,
+            'bytes_per_tick': round(per_tick, 1),
+            'bytes_per_tick_per_client': round(per_tick / self.connected, 1) if self.connected else None,
+            'bytes_per_delta': round(self.delta_bytes / self.delta_frames, 1) if self.delta_frames else None,
+            'latency_ms': {
+                'n': len(lat),
+                'mean': round(sum(lat) / len(lat), 3) if lat else None,
+                'p50': round(percentile(lat, 50), 3),
+                'p95': round(percentile(lat, 95), 3),
+                'p99': round(percentile(lat, 99), 3),
+                'max': round(lat[-1], 3) if lat else None,
+            },
+        }
+
+async def run_client(host:str, port:int, seconds:float, stats:LoadStats, rng:random.Random, mirror:Optional[StateMirror]=None):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.rejected += 1
+        return
+    clock = time.perf_counter
+    try:
+        data = await read_frame(reader)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        data = b"X"
+    if data[0] != MSG_WELCOME:
+        stats.rejected += 1
+        writer.close()
+        return
+    tick_ms = stats.tick_ms = WELCOME.unpack(data)[4]
+    if mirror is not None:
+        mirror.apply(data)
+    stats.connected += 1
+    sent: Dict[int, float] = {}   # token -> send time
+
+    async def send_inputs(recv):
+        inp = PlayerInput()
+        token = 0
+        end = clock() + seconds
+        while clock() < end and not recv.done():
+            if rng.random() < 0.2:
+                inp.dx, inp.dy = rng.choice(DIRS)
+            inp.bomb = rng.random() < 0.02
+            token += 1
+            sent[token] = clock()
+            writer.write(frame(INPUT.pack(MSG_INPUT, inp.encode(), token)))
+            await asyncio.sleep(tick_ms / 1000.0)
+
+    async def receive():
+        last_ack = 0
+        while True:
+            data = await read_frame(reader)
+            kind = data[0]
+            if kind == MSG_DELTA:
+                stats.delta_frames += 1
+                stats.delta_bytes += len(data) + 4
+                ack = DELTA.unpack_from(data)[1]
+                if ack > last_ack:
+                    now = clock()
+                    for t in range(last_ack + 1, ack + 1):
+                        t0 = sent.pop(t, None)
+                        if t0 is not None:
+                            stats.latencies.append((now - t0) * 1000.0)
+                    last_ack = ack
+            elif kind == MSG_FULL:
+                stats.full_frames += 1
+                stats.full_bytes += len(data) + 4
+            elif kind == MSG_ERROR:
+                return
+            if mirror is not None:
+                mirror.apply(data)
+
+    recv = asyncio.ensure_future(receive())
+    try:
+        await send_inputs(recv)
+    except ConnectionError:
+        pass
+    recv.cancel()
+    try:
+        await recv
+    except (asyncio.CancelledError, asyncio.IncompleteReadError, ConnectionError):
+        stats.disconnected += not recv.cancelled()
+    writer.close()
+
+async def run_load(host:str, port:int, clients:int, seconds:float, seed:int=0, mirrors:int=0, ramp:float=1.0) -> Dict[str, Any]:
+    stats = LoadStats()
+    rng = random.Random(seed)
+    tasks = []
+    t0 = time.perf_counter()
+    for k in range(clients):
+        mirror = StateMirror() if k < mirrors else None
+        tasks.append(asyncio.ensure_future(run_client(host, port, seconds, stats, random.Random(rng.random()), mirror)))
+        if ramp and clients:
+            await asyncio.sleep(ramp / clients)
+    await asyncio.gather(*tasks)
+    return stats.summary(time.perf_counter() - t0)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Simulate many clients against a match server.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=7777)
+    ap.add_argument("--clients", "-n", type=int, default=100)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--mirror", type=int, default=1, help="clients that also decode frames into a StateMirror")
+    ap.add_argument("--ramp", type=float, default=1.0, help="seconds over which the connections are opened")
+    args = ap.parse_args(argv)
+    res = asyncio.run(run_load(args.host, args.port, args.clients, args.seconds, args.seed, args.mirror, args.ramp))
+    print(json.dumps(res))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Wire protocol for networked matches.
+
+Every message is a frame: a little-endian u32 payload length followed by the
+payload, whose first byte is the message type.
+
+Client -> server:
+- `I` input: the `PlayerInput.encode` byte and a u32 token the server echoes
+  back as `ack`, so clients can time input -> state latency.
+
+Server -> client:
+- `W` welcome: the client's player id, map size and tick length.
+- `F` full state: every cell, entity, bomb and power-up (sent on join and when
+  a new match starts); the cell plane is zlib-compressed.
+- `D` delta: the client's last input token, then only what changed since the
+  previous tick: cells whose tile type or explosion flag changed, entities
+  that moved or were hit, bombs and power-ups that appeared or went away.
+  Bombs and power-ups carry a network id so they can be removed by id.
+- `X` error text (e.g. server full), then the connection is closed.
+
+A cell state byte is the tile type (bits 0-1) with bit 2 set while an
+explosion covers the cell. `DeltaTracker` builds the server's frames from a
+`Simulation`; `StateMirror` applies them on the client side.
+"""
+import struct
+import zlib
+from array import array
+from typing import Dict, List, Optional, Tuple
+from .entities import Computer
+from .map import GameMap
+
+LEN = struct.Struct("<I")
+INPUT = struct.Struct("<BBI")            # 'I', input byte, token
+WELCOME = struct.Struct("<BIHHH")        # 'W', player id, w, h, tick_ms
+FULL = struct.Struct("<BIIIII")          # 'F', tick, cells bytes (compressed), entities, bombs, power-ups
+DELTA_BODY = struct.Struct("<IIIHHHH")   # tick, cells, entities, new/gone bombs, new/gone power-ups
+DELTA = struct.Struct("<BI" + DELTA_BODY.format[1:])   # 'D', ack, then the body header
+ENT = struct.Struct("<IHHbB")            # id, x, y, health, flags (bit 0 alive, bit 1 bot)
+NEW_BOMB = struct.Struct("<IHHHB")       # net id, x, y, fuse left (ms), power
+NEW_PU = struct.Struct("<IHHB")          # net id, x, y, type index
+MSG_INPUT, MSG_WELCOME, MSG_FULL, MSG_DELTA, MSG_ERROR = b"IWFDX"
+EXPLODING = 4
+
+def frame(payload:bytes) -> bytes:
+    return LEN.pack(len(payload)) + payload
+
+async def read_frame(reader) -> bytes:
+    """Next frame's payload; raises `asyncio.IncompleteReadError` at EOF."""
+    n = LEN.unpack(await reader.readexactly(LEN.size))[0]
+    return await reader.readexactly(n)
+
+def cell_states(m:GameMap) -> bytearray:
+    out = bytearray(m.tiles)
+    exp = m.explosion
+    for i in range(len(out)):
+        if exp[i]:
+            out[i] |= EXPLODING
+    return out
+
+def _ent(e) -> Tuple[int, int, int, int]:
+    return (e.x, e.y, e.health, int(e.alive) | (2 if isinstance(e, Computer) else 0))
+
+class DeltaTracker:
+    """Server side: what each tick changed, relative to what was last sent.
+
+    Call `delta()` once after every `Simulation.step`; it returns the shared
+    body of that tick's `D` frame (without type and ack, see `delta_frame`).
+    `full()` encodes the current state and is consistent with the deltas
+    sent so far, so a client can join between any two ticks.
+    """
+    def __init__(self, sim):
+        self.attach(sim)
+
+    def attach(self, sim):
+        """Track `sim` (e.g. a new match); the next frame every client needs is a `full()`."""
+        old = getattr(self, 'sim', None)
+        if old is not None:
+            old.map.remove_listener(self._on_cell)
+        self.sim = sim
+        self._dirty: set = set()
+        self._sent = cell_states(sim.map)
+        self._ents: Dict[int, Tuple[int, int, int, int]] = {e.id: _ent(e) for e in sim.players + sim.bots}
+        # id(obj) -> (net id, obj); holding the object keeps its id() from being reused
+        self._bombs: Dict[int, Tuple[int, object]] = {}
+        self._pus: Dict[int, Tuple[int, object]] = {}
+        self._next_net_id = 1
+        self._sync(self._bombs, sim._bombs)
+        self._sync(self._pus, sim._powerups)
+        sim.map.add_listener(self._on_cell)
+
+    def _on_cell(self, x:int, y:int):
+        self._dirty.add(y*self.sim.map.w + x)
+
+    def _sync(self, known:Dict[int, Tuple[int, object]], live:Dict[int, object]) -> Tuple[list, List[int]]:
+        gone = [known.pop(k)[0] for k in [k for k in known if k not in live]]
+        new = []
+        for k, obj in live.items():
+            if k not in known:
+                known[k] = (self._next_net_id, obj)
+                self._next_net_id += 1
+                new.append(known[k])
+        return new, gone
+
+    def delta(self) -> bytes:
+        sim = self.sim
+        m = sim.map
+        tiles, exp, sent = m.tiles, m.explosion, self._sent
+        cells = array('I')
+        states = bytearray()
+        for i in sorted(self._dirty):
+            s = tiles[i] | (EXPLODING if exp[i] else 0)
+            if s != sent[i]:
+                sent[i] = s
+                cells.append(i)
+                states.append(s)
+        self._dirty.clear()
+        ents = []
+        known = self._ents
+        for e in sim.players + sim.bots:
+            t = _ent(e)
+            if known.get(e.id) != t:
+                known[e.id] = t
+                ents.append(ENT.pack(e.id, *t))
+        new_bombs, gone_bombs = self._sync(self._bombs, sim._bombs)
+        new_pus, gone_pus = self._sync(self._pus, sim._powerups)
+        now = sim.now
+        return b"".join([
+            DELTA_BODY.pack(sim.ticks, len(cells), len(ents), len(new_bombs), len(gone_bombs), len(new_pus), len(gone_pus)),
+            cells.tobytes(), bytes(states), *ents,
+            *(NEW_BOMB.pack(nid, b.x, b.y, max(0, min(0xFFFF, b.explode_at - now)), b.power) for nid, b in new_bombs),
+            array('I', gone_bombs).tobytes(),
+            *(NEW_PU.pack(nid, p.x, p.y, sim.config.POWERUP_TYPES.index(p.type)) for nid, p in new_pus),
+            array('I', gone_pus).tobytes(),
+        ])
+
+    def full(self) -> bytes:
+        sim = self.sim
+        cells = zlib.compress(bytes(self._sent), 6)
+        ents = sim.players + sim.bots
+        now = sim.now
+        types = sim.config.POWERUP_TYPES
+        return b"".join([
+            FULL.pack(MSG_FULL, sim.ticks, len(cells), len(ents), len(self._bombs), len(self._pus)),
+            cells,
+            *(ENT.pack(e.id, *self._ents[e.id]) for e in ents),
+            *(NEW_BOMB.pack(nid, b.x, b.y, max(0, min(0xFFFF, b.explode_at - now)), b.power) for nid, b in self._bombs.values()),
+            *(NEW_PU.pack(nid, p.x, p.y, types.index(p.type)) for nid, p in self._pus.values()),
+        ])
+
+def delta_frame(ack:int, body:bytes) -> List[bytes]:
+    """A client's `D` frame as buffers for `writelines`: its own length/type/ack
+    prefix and the body shared by every client."""
+    return [struct.pack("<IBI", 5 + len(body), MSG_DELTA, ack), body]
+
+class StateMirror:
+    """Client side: the match as reconstructed from `W`/`F`/`D` frames."""
+    def __init__(self):
+        self.player_id = 0
+        self.w = self.h = 0
+        self.tick_ms = 0
+        self.tick = 0
+        self.ack = 0
+        self.cells = bytearray()
+        self.entities: Dict[int, Tuple[int, int, int, int]] = {}   # id -> (x, y, health, flags)
+        self.bombs: Dict[int, Tuple[int, int, int, int]] = {}      # net id -> (x, y, fuse left when sent (ms), power)
+        self.powerups: Dict[int, Tuple[int, int, int]] = {}        # net id -> (x, y, type index)
+        self.error: Optional[str] = None
+
+    def apply(self, payload:bytes):
+        kind = payload[0]
+        if kind == MSG_DELTA:
+            self._apply_delta(payload)
+        elif kind == MSG_FULL:
+            self._apply_full(payload)
+        elif kind == MSG_WELCOME:
+            _, self.player_id, self.w, self.h, self.tick_ms = WELCOME.unpack(payload)
+        elif kind == MSG_ERROR:
+            self.error = payload[1:].decode("utf-8", "replace")
+        else:
+            raise ValueError(f"unknown message type {kind!r}")
+
+    def _read_bombs(self, data:bytes, pos:int, n:int) -> int:
+        for _ in range(n):
+            nid, x, y, fuse, power = NEW_BOMB.unpack_from(data, pos)
+            self.bombs[nid] = (x, y, fuse, power)
+            pos += NEW_BOMB.size
+        return pos
+
+    def _read_pus(self, data:bytes, pos:int, n:int) -> int:
+        for _ in range(n):
+            nid, x, y, t = NEW_PU.unpack_from(data, pos)
+            self.powerups[nid] = (x, y, t)
+            pos += NEW_PU.size
+        return pos
+
+    def _read_ents(self, data:bytes, pos:int, n:int) -> int:
+        ents = self.entities
+        for _ in range(n):
+            eid, x, y, health, flags = ENT.unpack_from(data, pos)
+            ents[eid] = (x, y, health, flags)
+            pos += ENT.size
+        return pos
+
+    def _apply_full(self, data:bytes):
+        _, self.tick, n_cells, n_ents, n_bombs, n_pus = FULL.unpack_from(data)
+        pos = FULL.size
+        self.cells = bytearray(zlib.decompress(data[pos:pos+n_cells]))
+        pos += n_cells
+        self.entities.clear()
+        self.bombs.clear()
+        self.powerups.clear()
+        pos = self._read_ents(data, pos, n_ents)
+        pos = self._read_bombs(data, pos, n_bombs)
+        self._read_pus(data, pos, n_pus)
+
+    def _apply_delta(self, data:bytes):
+        _, self.ack, self.tick, n_cells, n_ents, n_new_b, n_gone_b, n_new_p, n_gone_p = DELTA.unpack_from(data)
+        pos = DELTA.size
+        idx = array('I', data[pos:pos + 4*n_cells])
+        pos += 4*n_cells
+        cells = self.cells
+        for i, s in zip(idx, data[pos:pos + n_cells]):
+            cells[i] = s
+        pos += n_cells
+        pos = self._read_ents(data, pos, n_ents)
+        pos = self._read_bombs(data, pos, n_new_b)
+        for nid in array('I', data[pos:pos + 4*n_gone_b]):
+            self.bombs.pop(nid, None)
+        pos += 4*n_gone_b
+        pos = self._read_pus(data, pos, n_new_p)
+        for nid in array('I', data[pos:pos + 4*n_gone_p]):
+            self.powerups.pop(nid, None)
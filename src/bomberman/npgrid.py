@@ -0,0 +1,180 @@
+"""Optional NumPy backend for bulk grid work on very large maps.
+
+When NumPy is installed, `GameMap` generation, explosion coverage updates and
+the `DangerField`'s blast rays and danger queries switch to array operations
+once the work is big enough (`MIN_CELLS`, `BULK_MIN`) for the per-call
+overhead to pay off. Every vectorised path gives exactly the result of its
+pure-Python twin:
+
+- generation copies the Mersenne Twister state of the map's `random.Random`
+  into a `numpy.random.RandomState`, whose `random_sample` produces the same
+  doubles as `random.random()`, and draws one number per candidate cell in the
+  same row-major order;
+- blast rays are cast for all bombs at once, one array step per direction and
+  distance, and come back in the per-bomb order `_blast_cells` uses;
+- explosion counts are updated with per-cell occurrence counts, so duplicated
+  positions and the 255 cap behave as in the loop.
+
+Set `ENABLED = False` to force the pure-Python paths (e.g. to compare them).
+
+Benchmark both paths (and check they agree):
+    python3 -m bomberman.npgrid --size 1000x1000 --bombs 5000
+"""
+import argparse
+import random
+import time
+from itertools import chain
+from typing import Collection, List, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:   # the pure-Python paths are used instead
+    np = None
+
+ENABLED = np is not None
+MIN_CELLS = 4096   # maps smaller than this are generated by the Python loop
+BULK_MIN = 512     # positions/bombs/covered tiles below this stay in Python
+
+def active(size:int, threshold:int=BULK_MIN) -> bool:
+    return ENABLED and np is not None and size >= threshold
+
+def numpy_rng(rng:random.Random) -> "np.random.RandomState":
+    """RandomState continuing from `rng`'s current state (`rng` is not advanced)."""
+    _, internal, _ = rng.getstate()
+    rs = np.random.RandomState()
+    rs.set_state(('MT19937', np.array(internal[:-1], dtype=np.uint32), internal[-1], 0, 0.0))
+    return rs
+
+def generate(w:int, h:int, rng:random.Random, soft_density:float) -> Tuple[bytearray, bytearray, Set[int]]:
+    """Tiles, walk plane and soft cells of `GameMap._generate`'s layout."""
+    tiles = np.zeros((h, w), dtype=np.uint8)
+    tiles[0, :] = tiles[-1, :] = 2
+    tiles[:, 0] = tiles[:, -1] = 2
+    tiles[2:h-2:2, 2:w-2:2] = 2
+    ys, xs = np.ogrid[0:h, 0:w]
+    cand = tiles == 0
+    cand[0, :] = cand[-1, :] = False
+    cand[:, 0] = cand[:, -1] = False
+    cand &= ~(((xs <= 2) & (ys <= 2)) | ((xs >= w-3) & (ys >= h-3)))
+    flat = tiles.reshape(-1)
+    idx = np.flatnonzero(cand)
+    draws = numpy_rng(rng).random_sample(len(idx))
+    flat[idx[draws < soft_density]] = 1
+    walk = (flat == 0).view(np.uint8)
+    return bytearray(flat.tobytes()), bytearray(walk.tobytes()), set(np.flatnonzero(flat == 1).tolist())
+
+def blast_cells(tiles:bytearray, w:int, h:int, bombs:Sequence[Tuple[int,int,int]]) -> List[List[int]]:
+    """Cells each (x, y, power) bomb's blast covers, as `DangerField._blast_cells` lists them."""
+    n = len(bombs)
+    arr = np.array(bombs, dtype=np.int64).reshape(n, 3)
+    bx, by, power = arr[:, 0], arr[:, 1], arr[:, 2]
+    plane = np.frombuffer(tiles, dtype=np.uint8)
+    ids = np.arange(n)
+    owners = [ids]
+    cells = [by*w + bx]
+    top = int(power.max()) if n else 0
+    for dx, dy in ((1,0),(-1,0),(0,1),(0,-1)):
+        alive = np.ones(n, dtype=bool)
+        for step in range(1, top+1):
+            nx = bx + dx*step
+            ny = by + dy*step
+            alive &= (step <= power) & (nx >= 0) & (nx < w) & (ny >= 0) & (ny < h)
+            if not alive.any():
+                break
+            k = ids[alive]
+            i = ny[k]*w + nx[k]
+            tt = plane[i]
+            open_ = tt != 2
+            owners.append(k[open_])
+            cells.append(i[open_])
+            alive[k[tt != 0]] = False   # hard walls stop before, soft walls after the cell
+    owners_a = np.concatenate(owners)
+    order = np.argsort(owners_a, kind='stable')
+    flat = np.concatenate(cells)[order].tolist()
+    bounds = np.cumsum(np.bincount(owners_a, minlength=n)).tolist()
+    out, start = [], 0
+    for end in bounds:
+        out.append(flat[start:end])
+        start = end
+    return out
+
+def cells_at_or_before(times, limit:int, w:int) -> Set[Tuple[int,int]]:
+    """(x, y) of every cell of the int64 plane `times` that is <= `limit`."""
+    idx = np.flatnonzero(np.frombuffer(times, dtype=np.int64) <= limit)
+    return set(zip((idx % w).tolist(), (idx // w).tolist()))
+
+def update_counts(plane:bytearray, w:int, h:int, positions:Collection[Tuple[int,int]], delta:int) -> List[int]:
+    """Add `delta` (+1/-1) per occurrence of each in-bounds position to the
+    uint8 `plane`, saturating at 0/255; returns the cells that turned on
+    (+1) or off (-1)."""
+    n = len(positions)
+    xy = np.fromiter(chain.from_iterable(positions), dtype=np.int64, count=2*n).reshape(n, 2)
+    x, y = xy[:, 0], xy[:, 1]
+    xy = xy[(x >= 0) & (x < w) & (y >= 0) & (y < h)]
+    cells, counts = np.unique(xy[:, 1]*w + xy[:, 0], return_counts=True)
+    view = np.frombuffer(plane, dtype=np.uint8)
+    old = view[cells].astype(np.int64)
+    new = np.clip(old + delta*counts, 0, 255)
+    view[cells] = new
+    flipped = (old == 0) & (new > 0) if delta > 0 else (old > 0) & (new == 0)
+    return cells[flipped].tolist()
+
+def _sizes(text:str) -> Tuple[int,int]:
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h or w)
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - t0) * 1000.0
+
+def main(argv=None):
+    global ENABLED
+    from .danger_analysis import DangerField
+    from .entities import Bomb
+    from .map import GameMap
+    ap = argparse.ArgumentParser(description="Compare the NumPy and pure-Python grid paths on a large map.")
+    ap.add_argument("--size", default="1000x1000", help="WxH map size")
+    ap.add_argument("--bombs", type=int, default=5000)
+    ap.add_argument("--power", type=int, default=6)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+    if np is None:
+        ap.error("numpy is not installed")
+    w, h = _sizes(args.size)
+
+    def run():
+        m, gen_ms = _timed(lambda: GameMap(w, h, seed=args.seed))
+        rng = random.Random(args.seed)
+        free = [i for i in range(w*h) if m.walk[i]]
+        bombs = []
+        for n, i in enumerate(rng.sample(free, min(args.bombs, len(free)))):
+            bombs.append(Bomb(x=i % w, y=i // w, owner=None, explode_at=1000 + n, power=rng.randint(1, args.power)))
+        field = DangerField(m)
+        _, danger_ms = _timed(lambda: field.rebuild(bombs))
+        tiles, query_ms = _timed(lambda: field.danger_tiles(0, 1000 + len(bombs) // 2))
+        positions = [(i % w, i // w) for b in bombs for i in field._bombs[id(b)].cells]
+        _, add_ms = _timed(lambda: m.add_explosion(positions))
+        lit = bytes(m.explosion)
+        _, clear_ms = _timed(lambda: m.clear_explosion(positions))
+        digest = (bytes(m.tiles), bytes(m.walk), bytes(field.detonate_at), frozenset(tiles), lit, bytes(m.explosion))
+        return digest, (gen_ms, danger_ms, query_ms, add_ms, clear_ms)
+
+    saved = ENABLED
+    try:
+        ENABLED = False
+        ref, py = run()
+        ENABLED = True
+        got, vec = run()
+    finally:
+        ENABLED = saved
+    print(f"{w}x{h}, {args.bombs} bombs (power <= {args.power})")
+    print(f"{'phase':<16}{'python ms':>12}{'numpy ms':>12}")
+    for name, a, b in zip(("generate", "danger rebuild", "danger tiles", "add explosion", "clear explosion"), py, vec):
+        print(f"{name:<16}{a:12.1f}{b:12.1f}")
+    print("results identical" if got == ref else "RESULTS DIFFER")
+    if got != ref:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Pathfinding benchmark suite.
+
+Generates `GameMap`s over a grid of sizes, soft-wall densities and bomb counts,
+draws a fixed set of random start/goal queries per map (seeded, so every
+algorithm and every version sees the same workload; each goal is in its
+start's connected region, so every query has a path) and runs them through
+each selected algorithm. Per (map, algorithm) it reports:
+
+- throughput (queries/s) and per-query latency mean/p50/p95/p99 (us)
+- nodes expanded (size of the returned visited set, where there is one)
+- optimality against a BFS ground truth: optimal share of reachable queries
+  (a failure counts as not optimal), mean extra steps over found paths,
+  failures (no/invalid path where one exists, or a path where none does);
+  waypoint paths are expanded to single steps first
+- memory: peak traced allocation per query over a sample (tracemalloc)
+
+Results are written as JSON (a document with run metadata and one row per
+map/algorithm) or CSV. `--baseline` compares against an earlier JSON result
+and exits non-zero when throughput regressed by more than `--tolerance`.
+
+Usage:
+    python3 -m bomberman.pathbench --sizes 31x17,63x63 --densities 0.3,0.52 --bombs 0,20 --queries 2000 -o bench.json
+"""
+import argparse
+import csv
+import datetime
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .ai import a_star, DistanceField
+from .entities import Bomb
+from .hpa import HPAGraph, hpa_with_visited
+from .map import GameMap
+from .pathfinding import a_star_with_visited, dijkstra_with_visited, jps_simple_with_visited, jps_with_visited, JumpTable, _expand_path
+from .profiler import percentile
+
+Query = Tuple[Tuple[int,int], Tuple[int,int]]
+Runner = Callable[[Tuple[int,int], Tuple[int,int]], Tuple[Optional[List[Tuple[int,int]]], Optional[set]]]
+
+def _make_a_star(m:GameMap) -> Runner:
+    return lambda s, g: (a_star(m, s, g), None)
+
+def _make_with_visited(fn) -> Callable[[GameMap], Runner]:
+    return lambda m: (lambda s, g: fn(m, s, g))
+
+def _make_jps_plus(m:GameMap) -> Runner:
+    table = JumpTable(m)
+    return lambda s, g: jps_with_visited(m, s, g, set(), table)
+
+def _make_hpa(m:GameMap) -> Runner:
+    graph = HPAGraph(m)
+    graph.build()
+    return lambda s, g: hpa_with_visited(m, s, g, set(), graph)
+
+# name -> factory building a query runner for one map (setup such as JPS+ tables is timed separately)
+ALGORITHMS: Dict[str, Callable[[GameMap], Runner]] = {
+    'a_star': _make_a_star,
+    'a_star_with_visited': _make_with_visited(a_star_with_visited),
+    'dijkstra_with_visited': _make_with_visited(dijkstra_with_visited),
+    'jps_simple_with_visited': _make_with_visited(jps_simple_with_visited),
+    'jps_with_visited': _make_with_visited(jps_with_visited),
+    'jps+': _make_jps_plus,
+    'hpa': _make_hpa,
+}
+DEFAULT_ALGORITHMS = ('a_star', 'a_star_with_visited', 'dijkstra_with_visited', 'jps_simple_with_visited')
+
+def make_map(w:int, h:int, density:float, bombs:int, seed:int) -> GameMap:
+    """Generated map with `bombs` bombs dropped on random free cells."""
+    m = GameMap(w, h, seed=seed, soft_density=density)
+    rng = random.Random(seed ^ 0x5EED)
+    free = [i for i in range(w*h) if m.walk[i]]
+    for i in rng.sample(free, min(bombs, len(free))):
+        x, y = i % w, i // w
+        m.set_bomb(x, y, Bomb(x=x, y=y, owner=None, explode_at=0))
+    return m
+
+def components(m:GameMap) -> List[List[int]]:
+    """Connected regions of walkable cells (cell indices), in scan order."""
+    w, h, walk = m.w, m.h, m.walk
+    seen = bytearray(w * h)
+    out = []
+    for s in range(w * h):
+        if not walk[s] or seen[s]:
+            continue
+        seen[s] = 1
+        comp = [s]
+        for i in comp:
+            x = i % w
+            for j in (i+1 if x + 1 < w else -1, i-1 if x > 0 else -1, i+w if i + w < w*h else -1, i-w):
+                if j >= 0 and walk[j] and not seen[j]:
+                    seen[j] = 1
+                    comp.append(j)
+        out.append(comp)
+    return out
+
+def make_queries(m:GameMap, n:int, seed:int) -> List[Query]:
+    """`n` start/goal pairs with the goal drawn from the start's region, so every
+    query is reachable (random pairs on walled maps mostly are not, and would
+    time searches that fail after exhausting a small region)."""
+    rng = random.Random(seed)
+    w = m.w
+    regions = [c for c in components(m) if len(c) > 1]
+    # starts are uniform over the cells of those regions
+    region_of = [c for c in regions for _ in c]
+    if not region_of:
+        return []
+    out = []
+    for _ in range(n):
+        comp = rng.choice(region_of)
+        a, b = rng.sample(comp, 2)
+        out.append(((a % w, a // w), (b % w, b // w)))
+    return out
+
+def ground_truth(m:GameMap, queries:List[Query]) -> List[int]:
+    """BFS path length per query, -1 where the goal is unreachable."""
+    fields: Dict[Tuple[int,int], DistanceField] = {}
+    out = []
+    for s, g in queries:
+        f = fields.get(g)
+        if f is None:
+            f = fields[g] = DistanceField(m, g)
+        out.append(f.distance(s))
+    return out
+
+def _valid(m:GameMap, start:Tuple[int,int], goal:Tuple[int,int], path:List[Tuple[int,int]]) -> bool:
+    if not path:
+        return start == goal
+    px, py = start
+    for x, y in path:
+        if abs(x - px) + abs(y - py) != 1 or not m.is_walkable(x, y):
+            return False
+        px, py = x, y
+    return (px, py) == goal
+
+def bench_algorithm(name:str, m:GameMap, queries:List[Query], truth:Optional[List[int]], mem_queries:int=200) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    run = ALGORITHMS[name](m)
+    setup_ms = (time.perf_counter() - t0) * 1000.0
+    clock = time.perf_counter
+    lat: List[float] = []
+    nodes: List[int] = []
+    results = []
+    t_all = clock()
+    for s, g in queries:
+        t = clock()
+        path, visited = run(s, g)
+        lat.append((clock() - t) * 1e6)
+        results.append(path)
+        if visited is not None:
+            nodes.append(len(visited))
+    total_s = clock() - t_all
+    row: Dict[str, Any] = {
+        'algo': name,
+        'queries': len(queries),
+        'found': sum(1 for p in results if p is not None),
+        'setup_ms': round(setup_ms, 3),
+        'total_s': round(total_s, 6),
+        'qps': round(len(queries) / total_s, 1) if total_s else None,
+    }
+    lat.sort()
+    row.update({
+        'us_mean': round(sum(lat) / len(lat), 2) if lat else 0.0,
+        'us_p50': round(percentile(lat, 50), 2),
+        'us_p95': round(percentile(lat, 95), 2),
+        'us_p99': round(percentile(lat, 99), 2),
+    })
+    if nodes:
+        nodes.sort()
+        row['nodes_mean'] = round(sum(nodes) / len(nodes), 2)
+        row['nodes_p95'] = percentile(nodes, 95)
+    else:
+        row['nodes_mean'] = row['nodes_p95'] = None
+    if truth is not None:
+        optimal = failures = reachable = 0
+        excess: List[int] = []
+        for (s, g), path, d in zip(queries, results, truth):
+            if d < 0:
+                failures += path is not None
+                continue
+            reachable += 1
+            # waypoint paths (jps_simple) are checked and measured as single steps
+            steps = _expand_path(s, path) if path is not None else None
+            if steps is None or not _valid(m, s, g, steps):
+                failures += 1
+            else:
+                excess.append(len(steps) - d)
+                optimal += len(steps) == d
+        row['optimal'] = optimal
+        # a reachable query the algorithm failed on counts as not optimal
+        row['optimal_rate'] = round(optimal / reachable, 4) if reachable else None
+        row['mean_excess_steps'] = round(sum(excess) / len(excess), 4) if excess else None
+        row['failures'] = failures
+    # memory is measured in a separate pass: tracing slows every allocation down
+    sample = queries[:mem_queries]
+    if sample:
+        peaks = []
+        tracemalloc.start()
+        try:
+            for s, g in sample:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                run(s, g)
+                peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        finally:
+            tracemalloc.stop()
+        row['mem_peak_kb_mean'] = round(sum(peaks) / len(peaks) / 1024, 2)
+        row['mem_peak_kb_max'] = round(max(peaks) / 1024, 2)
+    return row
+
+def run_suite(sizes:List[Tuple[int,int]], densities:List[float], bombs:List[int], algos:List[str],
+              queries:int, seed:int=0, verify:bool=True, mem_queries:int=200, progress=None) -> List[Dict[str, Any]]:
+    rows = []
+    for (w, h) in sizes:
+        for density in densities:
+            for nb in bombs:
+                m = make_map(w, h, density, nb, seed)
+                qs = make_queries(m, queries, seed)
+                truth = ground_truth(m, qs) if verify else None
+                reachable = sum(1 for d in truth if d >= 0) if truth is not None else None
+                for name in algos:
+                    row = {'map_w': w, 'map_h': h, 'density': density, 'bombs': nb, 'seed': seed, 'reachable': reachable}
+                    row.update(bench_algorithm(name, m, qs, truth, mem_queries))
+                    rows.append(row)
+                    if progress:
+                        progress(row)
+    return rows
+
+def compare(rows:List[Dict[str, Any]], baseline:List[Dict[str, Any]], tolerance:float) -> List[str]:
+    """Rows whose throughput fell more than `tolerance` (fraction) below the baseline's."""
+    key = lambda r: (r['map_w'], r['map_h'], r['density'], r['bombs'], r['seed'], r['queries'], r['algo'])
+    base = {key(r): r for r in baseline}
+    out = []
+    for r in rows:
+        b = base.get(key(r))
+        if b and b.get('qps') and r.get('qps') and r['qps'] < b['qps'] * (1 - tolerance):
+            out.append(f"{r['algo']} {r['map_w']}x{r['map_h']} d={r['density']} bombs={r['bombs']}: "
+                       f"{r['qps']:.0f} q/s vs {b['qps']:.0f} q/s ({r['qps'] / b['qps'] - 1:+.1%})")
+    return out
+
+def _sizes(text:str) -> List[Tuple[int,int]]:
+    out = []
+    for part in text.split(","):
+        w, _, h = part.lower().partition("x")
+        out.append((int(w), int(h or w)))
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark pathfinding algorithms on generated maps.")
+    ap.add_argument("--sizes", default="31x17,63x63", help="comma separated WxH map sizes")
+    ap.add_argument("--densities", default="0.52", help="comma separated soft-wall densities")
+    ap.add_argument("--bombs", default="0", help="comma separated bomb counts per map")
+    ap.add_argument("--algos", default=",".join(DEFAULT_ALGORITHMS), help=f"comma separated, from: {', '.join(ALGORITHMS)}")
+    ap.add_argument("--queries", "-q", type=int, default=1000, help="random start/goal queries per map")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--mem-queries", type=int, default=200, help="queries sampled for the memory pass (0 to skip)")
+    ap.add_argument("--no-verify", action="store_true", help="skip the BFS ground truth (no optimality columns)")
+    ap.add_argument("--format", choices=("json", "csv"), default=None, help="default: from --out extension, else json")
+    ap.add_argument("--out", "-o", default="-", help="output path ('-' for stdout)")
+    ap.add_argument("--baseline", default=None, help="earlier JSON result to check throughput against")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="allowed throughput drop vs --baseline (fraction)")
+    args = ap.parse_args(argv)
+
+    algos = [a.strip() for a in args.algos.split(",") if a.strip()]
+    for a in algos:
+        if a not in ALGORITHMS:
+            ap.error(f"unknown algorithm {a!r}")
+    fmt = args.format or ("csv" if args.out.endswith(".csv") else "json")
+    log = lambda r: print(f"{r['algo']:<24} {r['map_w']}x{r['map_h']} d={r['density']} bombs={r['bombs']}: "
+                          f"{r['qps']} q/s, nodes {r['nodes_mean']}, found {r['found']}/{r['queries']}, optimal {r.get('optimal_rate')}", file=sys.stderr)
+    rows = run_suite(_sizes(args.sizes), [float(d) for d in args.densities.split(",")], [int(b) for b in args.bombs.split(",")],
+                     algos, args.queries, args.seed, not args.no_verify, args.mem_queries, log)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", newline="")
+    try:
+        if fmt == "csv":
+            fields = list(dict.fromkeys(k for r in rows for k in r))
+            wr = csv.DictWriter(out, fieldnames=fields)
+            wr.writeheader()
+            wr.writerows(rows)
+        else:
+            json.dump({
+                'meta': {
+                    'created': datetime.datetime.now().isoformat(timespec="seconds"),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'argv': sys.argv[1:] if argv is None else list(argv),
+                },
+                'results': rows,
+            }, out, indent=1)
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(rows, json.load(fh)['results'], args.tolerance)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
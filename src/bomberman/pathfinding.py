@@ -1,10 +1,11 @@
-"""Multiple pathfinding algorithms: A*, Dijkstra, and a simple JPS-like optimizer.
+"""Multiple pathfinding algorithms: A*, Dijkstra, Jump Point Search and a simple JPS-like optimizer.
 
 This module provides implementations that operate on the game's GameMap.
 Each search returns the path (list of coordinates) and optionally the visited set
 for visualization and metrics.
 """
 from typing import List, Tuple, Optional, Set, Dict, Callable
+from array import array
 import heapq
 import time
 from .utils import manhattan, neighbors
@@ -20,6 +21,7 @@ def a_star_with_visited(game_map: GameMap, start: Tuple[int,int], goal: Tuple[in
     gscore = {start: 0}
     closed = set()
     visited = set()
+    w, h, walk = game_map.w, game_map.h, game_map.walk
     while openh:
         f,g,current = heapq.heappop(openh)
         if current in closed:
@@ -36,11 +38,9 @@ def a_star_with_visited(game_map: GameMap, start: Tuple[int,int], goal: Tuple[in
         closed.add(current)
         x,y = current
         for nx,ny in neighbors(current):
-            if not game_map.in_bounds(nx,ny): continue
+            if not (0 <= nx < w and 0 <= ny < h): continue
             if (nx,ny) in forbidden: continue
-            tile = game_map.grid[ny][nx]
-            if tile.ttype != 0: continue
-            if tile.bomb is not None: continue
+            if not walk[ny*w + nx]: continue
             tentative = g + 1
             if (nx,ny) not in gscore or tentative < gscore[(nx,ny)]:
                 gscore[(nx,ny)] = tentative
@@ -58,6 +58,7 @@ def dijkstra_with_visited(game_map: GameMap, start: Tuple[int,int], goal: Tuple[
     dist = {start: 0}
     visited = set()
     closed = set()
+    w, h, walk = game_map.w, game_map.h, game_map.walk
     while openh:
         g,current = heapq.heappop(openh)
         if current in closed:
@@ -73,11 +74,9 @@ def dijkstra_with_visited(game_map: GameMap, start: Tuple[int,int], goal: Tuple[
             return path, visited
         closed.add(current)
         for nx,ny in neighbors(current):
-            if not game_map.in_bounds(nx,ny): continue
+            if not (0 <= nx < w and 0 <= ny < h): continue
             if (nx,ny) in forbidden: continue
-            tile = game_map.grid[ny][nx]
-            if tile.ttype != 0: continue
-            if tile.bomb is not None: continue
+            if not walk[ny*w + nx]: continue
             tentative = g + 1
             if (nx,ny) not in dist or tentative < dist[(nx,ny)]:
                 dist[(nx,ny)] = tentative
@@ -88,7 +87,7 @@ def dijkstra_with_visited(game_map: GameMap, start: Tuple[int,int], goal: Tuple[
 def jps_simple_with_visited(game_map: GameMap, start: Tuple[int,int], goal: Tuple[int,int], forbidden: Set[Tuple[int,int]]=set()):
     """A simplified Jump Point Search-like optimizer.
 
-    This is not a full JPS implementation but acts as a jump-step pruner:
+    This is not a full JPS implementation (see `jps_with_visited`) but acts as a jump-step pruner:
     when moving straight in cardinal directions, it "jumps" multiple tiles until
     an obstacle or the goal is reached, treating that landing as a neighbor.
     It greatly reduces node expansions on open corridors.
@@ -104,16 +103,17 @@ def jps_simple_with_visited(game_map: GameMap, start: Tuple[int,int], goal: Tupl
     closed = set()
     visited = set()
 
+    w, h, walk = game_map.w, game_map.h, game_map.walk
+
     def jump_line(x,y,dx,dy):
         # step along (dx,dy) until hitting obstacle or reaching goal; return last free cell
         steps = 0
         while True:
             nx = x + dx
             ny = y + dy
-            if not game_map.in_bounds(nx,ny):
+            if not (0 <= nx < w and 0 <= ny < h):
                 return None
-            tile = game_map.grid[ny][nx]
-            if tile.ttype != 0 or tile.bomb is not None:
+            if not walk[ny*w + nx]:
                 return (x,y) if steps>0 else None
             steps += 1
             x,y = nx,ny
@@ -146,3 +146,266 @@ def jps_simple_with_visited(game_map: GameMap, start: Tuple[int,int], goal: Tupl
                 came[(nx,ny)] = current
                 heapq.heappush(openh, (tentative + manhattan((nx,ny), goal), tentative, (nx,ny)))
     return None, visited
+
+def _expand_path(start: Tuple[int,int], points: List[Tuple[int,int]]) -> List[Tuple[int,int]]:
+    """Expand straight segments between jump points into single steps."""
+    path = []
+    cx, cy = start
+    for (px, py) in points:
+        sx = (px > cx) - (px < cx)
+        sy = (py > cy) - (py < cy)
+        while (cx, cy) != (px, py):
+            cx += sx
+            cy += sy
+            path.append((cx, cy))
+    return path
+
+class JumpTable:
+    """JPS+ style jump-distance tables for 4-connected JPS.
+
+    For every cell and direction, a positive value is the distance to the next
+    jump point along that direction; zero or negative is minus the number of
+    walkable cells before a wall. `sync` (called by `jps_with_visited` before
+    each search) brings the tables up to date from the map's change log and
+    only rebuilds the rows and columns the changed cells can affect; when the
+    log no longer reaches back far enough the whole table is rebuilt. The
+    table holds no listener, so an unused one costs nothing.
+    """
+    def __init__(self, game_map: GameMap):
+        self.map = game_map
+        n = game_map.w * game_map.h
+        self.east = array('i', [0]) * n
+        self.west = array('i', [0]) * n
+        self.south = array('i', [0]) * n
+        self.north = array('i', [0]) * n
+        self.updates = 0
+        self.rebuilds = 0
+        self.build()
+        self._version = game_map.version
+
+    def build(self):
+        for y in range(self.map.h):
+            self._build_row(y)
+        for x in range(self.map.w):
+            self._build_col(x)
+
+    def sync(self):
+        """Catch up with the map changes made since the last sync."""
+        m = self.map
+        if m.version == self._version:
+            return
+        changed = m.changed_since(self._version)
+        if changed is None:
+            self.build()
+            self.rebuilds += 1
+        elif changed:
+            w = m.w
+            self.update_cells([(i % w, i // w) for i in changed])
+        self._version = m.version
+
+    def update_cell(self, cx: int, cy: int):
+        """Refresh the tables after the walkability of (cx, cy) changed."""
+        self.update_cells([(cx, cy)])
+
+    def update_cells(self, cells: List[Tuple[int,int]]):
+        """Refresh the tables after the walkability of `cells` changed."""
+        m = self.map
+        w, h = m.w, m.h
+        rows, cols = set(), set()
+        for (cx, cy) in cells:
+            rows.update((cy-1, cy, cy+1))
+            cols.update((cx-1, cx, cx+1))
+        for y in rows:
+            if not 0 <= y < h: continue
+            row = y*w
+            before = [self.east[row+x] > 0 or self.west[row+x] > 0 for x in range(w)]
+            self._build_row(y)
+            for x in range(w):
+                if before[x] != (self.east[row+x] > 0 or self.west[row+x] > 0):
+                    cols.add(x)
+        for x in cols:
+            if 0 <= x < w:
+                self._build_col(x)
+        self.updates += 1
+
+    def _build_row(self, y: int):
+        m = self.map
+        w, walk = m.w, m.walk
+        row = y*w
+        up = row - w if y > 0 else -1
+        down = row + w if y + 1 < m.h else -1
+
+        def forced(x, dx):
+            # cell (x, y) entered moving dx: an open side whose cell behind is blocked
+            bx = x - dx
+            if up >= 0 and walk[up+x] and not (0 <= bx < w and walk[up+bx]): return True
+            if down >= 0 and walk[down+x] and not (0 <= bx < w and walk[down+bx]): return True
+            return False
+
+        east, west = self.east, self.west
+        for x in range(w-1, -1, -1):
+            nx = x + 1
+            if nx >= w or not walk[row+nx]:
+                east[row+x] = 0
+            elif forced(nx, 1):
+                east[row+x] = 1
+            else:
+                v = east[row+nx]
+                east[row+x] = v + 1 if v > 0 else v - 1
+        for x in range(w):
+            nx = x - 1
+            if nx < 0 or not walk[row+nx]:
+                west[row+x] = 0
+            elif forced(nx, -1):
+                west[row+x] = 1
+            else:
+                v = west[row+nx]
+                west[row+x] = v + 1 if v > 0 else v - 1
+
+    def _build_col(self, x: int):
+        m = self.map
+        w, h, walk = m.w, m.h, m.walk
+        east, west = self.east, self.west
+
+        def stop(y, dy):
+            i = y*w + x
+            if east[i] > 0 or west[i] > 0:
+                return True
+            by = y - dy
+            for sx in (x-1, x+1):
+                if 0 <= sx < w and walk[y*w+sx] and not (0 <= by < h and walk[by*w+sx]):
+                    return True
+            return False
+
+        south, north = self.south, self.north
+        for y in range(h-1, -1, -1):
+            ny = y + 1
+            i = y*w + x
+            if ny >= h or not walk[ny*w+x]:
+                south[i] = 0
+            elif stop(ny, 1):
+                south[i] = 1
+            else:
+                v = south[i+w]
+                south[i] = v + 1 if v > 0 else v - 1
+        for y in range(h):
+            ny = y - 1
+            i = y*w + x
+            if ny < 0 or not walk[ny*w+x]:
+                north[i] = 0
+            elif stop(ny, -1):
+                north[i] = 1
+            else:
+                v = north[i-w]
+                north[i] = v + 1 if v > 0 else v - 1
+
+def jps_with_visited(game_map: GameMap, start: Tuple[int,int], goal: Tuple[int,int], forbidden: Set[Tuple[int,int]]=set(), table: Optional[JumpTable]=None):
+    """Jump Point Search for 4-connected grids.
+
+    Straight moves are only interrupted at forced neighbours (an open side cell
+    whose cell behind is blocked); vertical scans also stop where a horizontal
+    scan would find a jump point. With a `JumpTable` (and no `forbidden` set)
+    scans are replaced by table lookups. The returned path is expanded to
+    single steps; `visited` holds the expanded jump points.
+    Returns (path, visited).
+    """
+    if start == goal:
+        return [], set()
+    w, h, walk = game_map.w, game_map.h, game_map.walk
+    gx, gy = goal
+    if forbidden:
+        table = None
+    if table is not None:
+        table.sync()
+
+    def free(x, y):
+        return 0 <= x < w and 0 <= y < h and walk[y*w + x] and (x, y) not in forbidden
+
+    def hscan(x, y, dx):
+        # first jump point (or goal) moving dx from (x, y), excluding (x, y)
+        while True:
+            x += dx
+            if not free(x, y): return None
+            if x == gx and y == gy: return (x, y)
+            if (free(x, y-1) and not free(x-dx, y-1)) or (free(x, y+1) and not free(x-dx, y+1)):
+                return (x, y)
+
+    def vscan(x, y, dy):
+        while True:
+            y += dy
+            if not free(x, y): return None
+            if x == gx and y == gy: return (x, y)
+            if (free(x-1, y) and not free(x-1, y-dy)) or (free(x+1, y) and not free(x+1, y-dy)):
+                return (x, y)
+            if hscan(x, y, 1) or hscan(x, y, -1):
+                return (x, y)
+
+    def htable(x, y, dx):
+        v = (table.east if dx > 0 else table.west)[y*w + x]
+        reach = v if v > 0 else -v
+        if gy == y and 0 < (gx - x) * dx <= reach:
+            return goal
+        return (x + dx*v, y) if v > 0 else None
+
+    def vtable(x, y, dy):
+        v = (table.south if dy > 0 else table.north)[y*w + x]
+        reach = v if v > 0 else -v
+        best = v if v > 0 else None
+        k = (gy - y) * dy
+        if 0 < k <= reach and (best is None or k < best):
+            if gx == x:
+                best = k
+            else:
+                # a horizontal scan from the goal's row would run into the goal
+                hv = (table.east if gx > x else table.west)[gy*w + x]
+                if abs(gx - x) <= (hv if hv > 0 else -hv):
+                    best = k
+        return (x, y + dy*best) if best is not None else None
+
+    if table is not None:
+        hjump, vjump = htable, vtable
+    else:
+        hjump, vjump = hscan, vscan
+
+    openh = []
+    heapq.heappush(openh, (manhattan(start,goal), 0, start, 0, 0))
+    came: Dict[Tuple[int,int], Tuple[int,int]] = {}
+    gscore = {start: 0}
+    closed = set()
+    visited = set()
+    while openh:
+        f,g,current,pdx,pdy = heapq.heappop(openh)
+        if current in closed:
+            continue
+        visited.add(current)
+        if current == goal:
+            points = []
+            cur = current
+            while cur != start:
+                points.append(cur)
+                cur = came[cur]
+            points.reverse()
+            return _expand_path(start, points), visited
+        closed.add(current)
+        x,y = current
+        # pruned directions: straight on plus both sides, or all four at the start
+        if pdx:
+            dirs = [(pdx,0),(0,1),(0,-1)]
+        elif pdy:
+            dirs = [(0,pdy),(1,0),(-1,0)]
+        else:
+            dirs = [(1,0),(-1,0),(0,1),(0,-1)]
+        for dx,dy in dirs:
+            if not free(x+dx, y+dy): continue
+            j = hjump(x, y, dx) if dx else vjump(x, y, dy)
+            if j is None: continue
+            tentative = g + manhattan(current, j)
+            if j not in gscore or tentative < gscore[j]:
+                gscore[j] = tentative
+                came[j] = current
+                heapq.heappush(openh, (tentative + manhattan(j, goal), tentative, j, dx, dy))
+    return None, visited
+
+def jps(game_map: GameMap, start: Tuple[int,int], goal: Tuple[int,int], forbidden: Set[Tuple[int,int]]=set(), table: Optional[JumpTable]=None) -> Optional[List[Tuple[int,int]]]:
+    """`a_star`-compatible wrapper around `jps_with_visited`."""
+    return jps_with_visited(game_map, start, goal, forbidden, table)[0]
@@ -0,0 +1,318 @@
+"""Lookahead planner for bots: Monte Carlo rollouts over cloned matches.
+
+A planner bot still runs `Simulation.decide` (so its state and HUD behave as
+usual), but instead of acting on the state machine it picks its next action
+(wait, one of the four moves, or drop a bomb) by playing the match forward:
+
+- the current match is cloned once (`Simulation.clone`), then every rollout
+  clones that root, applies one candidate action and steps the copy for
+  `depth` ticks;
+- the clone's scheduler is swapped for `RolloutPolicy`, a cheap stand-in for
+  bot thinking: the planning bot walks at random, avoiding tiles about to
+  blow and escaping with `DangerField.escape_path` when caught in a blast,
+  and sometimes bombs; other bots follow their current path or evade;
+- actions are chosen for rollouts with UCB1 (every action is tried once
+  first) and the one with the best mean score is played. The best rollout of
+  that action becomes the bot's path until its next think.
+
+A rollout is scored on whether the bot survives, kills made, opponents and
+the bot itself standing in a blast when the horizon is reached, walls
+destroyed and distance to the nearest opponent.
+
+Thinking stops at whichever comes first of `budget_ms` of wall-clock time
+(checked between rollouts, so one rollout may overrun it) and `rollouts`.
+With `budget_ms=None` the number of rollouts is fixed and matches replay
+identically; with a time budget results depend on machine speed, as with the
+scheduler's budget.
+
+Compare planner bots with state-machine bots in headless matches:
+    python3 -m bomberman.planner --matches 20 --bots 4 --planners 1 --budget-ms 6
+"""
+import argparse
+import json
+import math
+import random
+from collections import deque
+from time import perf_counter
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from . import config
+from .danger_analysis import NEVER
+from .entities import Computer
+from .profiler import percentile
+
+WAIT, BOMB = (0, 0), None
+MOVES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+# rollout score weights
+DEATH = -100.0
+KILL = 40.0
+OPPONENT_IN_BLAST = 12.0
+SELF_IN_BLAST = -15.0
+WALL = 1.5
+DISTANCE = -0.4
+
+class RolloutPolicy:
+    """Stands in for `AIScheduler` inside a rollout (`update(sim)` per tick)."""
+    def __init__(self, rng:random.Random, bomb_chance:float=0.03):
+        self.rng = rng
+        self.bomb_chance = bomb_chance
+        self.me: Optional[Computer] = None
+
+    def update(self, sim:Any):
+        me = self.me
+        for bot in sim.bots:
+            if not bot.alive:
+                continue
+            if bot is me:
+                self._step_me(sim, bot)
+            elif bot.path:
+                sim.follow_path_step(bot)
+            elif sim.in_danger(bot):
+                sim.evade(bot)
+
+    def _step_me(self, sim:Any, bot:Computer):
+        m = sim.map
+        w, walk = m.w, m.walk
+        t = sim.danger.detonate_at
+        now = sim.now
+        if t[bot.y*w + bot.x] <= now + config.BOT_DANGER_MS:
+            if not bot.path:
+                bot.path = sim.danger.escape_path((bot.x, bot.y), now, config.TICK_MS) or []
+            sim.follow_path_step(bot)
+            return
+        bot.path = []
+        rng = self.rng
+        if bot.can_place() and rng.random() < self.bomb_chance and sim.place_bomb(bot):
+            return
+        soon = now + 2 * config.TICK_MS
+        opts = []
+        for dx, dy in MOVES:
+            i = (bot.y + dy)*w + bot.x + dx
+            if walk[i] and t[i] > soon:
+                opts.append((bot.x + dx, bot.y + dy))
+        if opts and rng.random() < 0.8:
+            sim.move_entity(bot, *rng.choice(opts))
+
+class Planner:
+    """Plans for the bots whose ids are in `bots`; attach as `Simulation.planner`.
+
+    Think-time percentiles in `stats()` cover the last `window` decisions.
+    """
+    def __init__(self, bots:Iterable[int]=(), budget_ms:Optional[float]=config.PLANNER_BUDGET_MS,
+                 rollouts:int=config.PLANNER_ROLLOUTS, depth:int=config.PLANNER_DEPTH, seed:int=0, explore:float=1.4,
+                 window:int=1000):
+        self.bots = set(bots)
+        self.budget_ms = budget_ms
+        self.rollouts = rollouts
+        self.depth = depth
+        self.explore = explore
+        self.rng = random.Random(seed)
+        self.policy = RolloutPolicy(self.rng)
+        # metrics
+        self.thinks = 0
+        self.total_rollouts = 0
+        self.total_ms = 0.0
+        self.think_ms: Deque[float] = deque(maxlen=window)
+        self.max_ms = 0.0
+        self.last_rollouts = 0
+
+    def actions(self, sim:Any, bot:Computer) -> List[Optional[Tuple[int,int]]]:
+        out: List[Optional[Tuple[int,int]]] = [WAIT]
+        for dx, dy in MOVES:
+            if sim.map.is_walkable(bot.x + dx, bot.y + dy):
+                out.append((dx, dy))
+        if bot.can_place() and sim.map.bomb_at(bot.x, bot.y) is None:
+            out.append(BOMB)
+        return out
+
+    def think(self, sim:Any, bot:Computer):
+        """Pick and start `bot`'s next action (the caller has run `sim.decide`)."""
+        t0 = perf_counter()
+        deadline = t0 + self.budget_ms / 1000.0 if self.budget_ms is not None else None
+        actions = self.actions(sim, bot)
+        k = sim.bots.index(bot)
+        n = len(actions)
+        visits = [0] * n
+        totals = [0.0] * n
+        best: List[Tuple[float, List[Tuple[int,int]]]] = [(-math.inf, [])] * n
+        done = 0
+        if n > 1:
+            root = sim.clone()
+            while done < self.rollouts and (deadline is None or perf_counter() < deadline):
+                a = self._select(visits, totals, done)
+                score, trail = self._rollout(root, k, actions[a])
+                visits[a] += 1
+                totals[a] += score
+                if score > best[a][0]:
+                    best[a] = (score, trail)
+                done += 1
+        if done:
+            a = max((i for i in range(n) if visits[i]), key=lambda i: (totals[i] / visits[i], visits[i]))
+        else:
+            a = 0
+        self._play(sim, bot, actions[a], best[a][1])
+        ms = (perf_counter() - t0) * 1000.0
+        self.thinks += 1
+        self.total_rollouts += done
+        self.total_ms += ms
+        self.think_ms.append(ms)
+        self.max_ms = max(self.max_ms, ms)
+        self.last_rollouts = done
+
+    def _select(self, visits:List[int], totals:List[float], done:int) -> int:
+        for i, v in enumerate(visits):
+            if not v:
+                return i
+        logn = math.log(done)
+        c = self.explore * 50.0   # scores span roughly DEATH..KILL
+        return max(range(len(visits)), key=lambda i: totals[i] / visits[i] + c * math.sqrt(logn / visits[i]))
+
+    def _rollout(self, root:Any, k:int, action:Optional[Tuple[int,int]]) -> Tuple[float, List[Tuple[int,int]]]:
+        c = root.clone()
+        me = c.bots[k]
+        me.path = []
+        policy = self.policy
+        policy.me = me
+        c.scheduler = policy
+        kills, walls = me.kills, c.soft_destroyed
+        self._act(c, me, action)
+        # the rest of the current tick, as `Simulation.step` would run it
+        c.process_bombs()
+        c.prune_explosions()
+        trail = [(me.x, me.y)]
+        for _ in range(self.depth):
+            if not me.alive or c.is_over():
+                break
+            c.step(config.TICK_MS)
+            trail.append((me.x, me.y))
+        return self._score(c, me, me.kills - kills, c.soft_destroyed - walls), trail
+
+    def _score(self, sim:Any, me:Computer, kills:int, walls:int) -> float:
+        score = KILL * kills + WALL * walls
+        if not me.alive:
+            return score + DEATH
+        w = sim.map.w
+        t = sim.danger.detonate_at
+        if t[me.y*w + me.x] != NEVER:
+            score += SELF_IN_BLAST
+        nearest = None
+        for e in sim.players + sim.bots:
+            if e is me or not e.alive:
+                continue
+            if t[e.y*w + e.x] != NEVER:
+                score += OPPONENT_IN_BLAST
+            d = abs(e.x - me.x) + abs(e.y - me.y)
+            if nearest is None or d < nearest:
+                nearest = d
+        if nearest is not None:
+            score += DISTANCE * nearest
+        return score
+
+    @staticmethod
+    def _act(sim:Any, bot:Computer, action:Optional[Tuple[int,int]]):
+        if action is BOMB:
+            sim.place_bomb(bot)
+        elif action != WAIT:
+            sim.move_entity(bot, bot.x + action[0], bot.y + action[1])
+
+    def _play(self, sim:Any, bot:Computer, action:Optional[Tuple[int,int]], trail:List[Tuple[int,int]]):
+        self._act(sim, bot, action)
+        # keep walking the best rollout's route (waits dropped) until the next think
+        path = []
+        last = (bot.x, bot.y)
+        for pos in trail[1:]:
+            if pos != last:
+                path.append(pos)
+                last = pos
+        bot.path = path
+
+    def stats(self) -> Dict[str, Any]:
+        ms = sorted(self.think_ms)
+        return {
+            'budget_ms': self.budget_ms,
+            'max_rollouts': self.rollouts,
+            'depth': self.depth,
+            'thinks': self.thinks,
+            'rollouts': self.total_rollouts,
+            'rollouts_per_sec': round(self.total_rollouts / self.total_ms * 1000.0, 1) if self.total_ms else 0.0,
+            'rollouts_per_think': round(self.total_rollouts / self.thinks, 1) if self.thinks else 0.0,
+            'think_ms': {
+                'mean': round(self.total_ms / self.thinks, 3) if self.thinks else None,
+                'p50': round(percentile(ms, 50), 3),
+                'p99': round(percentile(ms, 99), 3),
+                'max': round(self.max_ms, 3) if self.thinks else None,
+            },
+        }
+
+def play_match(seed:int, planners:int, bot_count:int=4, map_w:int=config.MAP_W, map_h:int=config.MAP_H,
+               max_ticks:int=3000, planner:Optional[Planner]=None) -> Dict[str, Any]:
+    """One bots-only match in which the first `planners` bots plan; returns survival per kind."""
+    from .simulation import Simulation
+    sim = Simulation(map_w, map_h, bot_count=bot_count, map_seed=seed, seed=seed, player_count=0)
+    if planners:
+        planner = planner or Planner()
+        planner.bots = {b.id for b in sim.bots[:planners]}
+        sim.planner = planner
+    died = {b.id: None for b in sim.bots}
+    while sim.ticks < max_ticks and not sim.is_over():
+        sim.step(config.TICK_MS)
+        for b in sim.bots:
+            if not b.alive and died[b.id] is None:
+                died[b.id] = sim.ticks
+    alive = [b for b in sim.bots if b.alive]
+    winner = alive[0] if len(alive) == 1 else None
+    planned = set(b.id for b in sim.bots[:planners])
+    return {
+        'seed': seed,
+        'ticks': sim.ticks,
+        'winner_kind': ('planner' if winner.id in planned else 'fsm') if winner else None,
+        'survival': {b.id: died[b.id] if died[b.id] is not None else sim.ticks for b in sim.bots},
+        'kills': {b.id: b.kills for b in sim.bots},
+        'planned': sorted(planned),
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Play bots-only matches with some planner bots and report strength and planning cost.")
+    ap.add_argument("--matches", "-n", type=int, default=20)
+    ap.add_argument("--bots", type=int, default=4)
+    ap.add_argument("--planners", type=int, default=1, help="how many of the bots plan (the rest use the state machine)")
+    ap.add_argument("--budget-ms", type=float, default=config.PLANNER_BUDGET_MS, help="per-think time budget (0 = rollout count only)")
+    ap.add_argument("--rollouts", type=int, default=config.PLANNER_ROLLOUTS, help="max rollouts per think")
+    ap.add_argument("--depth", type=int, default=config.PLANNER_DEPTH, help="ticks simulated per rollout")
+    ap.add_argument("--map-w", type=int, default=config.MAP_W)
+    ap.add_argument("--map-h", type=int, default=config.MAP_H)
+    ap.add_argument("--max-ticks", type=int, default=3000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    planner = Planner(budget_ms=args.budget_ms or None, rollouts=args.rollouts, depth=args.depth, seed=args.seed)
+    wins = {'planner': 0, 'fsm': 0, None: 0}
+    surv = {'planner': [], 'fsm': []}
+    kills = {'planner': 0, 'fsm': 0}
+    for m in range(args.matches):
+        res = play_match(args.seed + m, args.planners, args.bots, args.map_w, args.map_h, args.max_ticks, planner)
+        wins[res['winner_kind']] += 1
+        for bid, ticks in res['survival'].items():
+            kind = 'planner' if bid in res['planned'] else 'fsm'
+            surv[kind].append(ticks)
+            kills[kind] += res['kills'][bid]
+    n_plan = args.planners * args.matches
+    n_fsm = (args.bots - args.planners) * args.matches
+    print(json.dumps({
+        'matches': args.matches,
+        'bots': args.bots,
+        'planners': args.planners,
+        'wins': {'planner': wins['planner'], 'fsm': wins['fsm'], 'draw': wins[None]},
+        'win_rate_per_bot': {
+            'planner': round(wins['planner'] / n_plan, 3) if n_plan else None,
+            'fsm': round(wins['fsm'] / n_fsm, 3) if n_fsm else None,
+        },
+        'mean_survival_ticks': {k: round(sum(v) / len(v), 1) if v else None for k, v in surv.items()},
+        'kills_per_bot': {
+            'planner': round(kills['planner'] / n_plan, 3) if n_plan else None,
+            'fsm': round(kills['fsm'] / n_fsm, 3) if n_fsm else None,
+        },
+        'planner': planner.stats(),
+    }))
+
+if __name__ == "__main__":
+    main()
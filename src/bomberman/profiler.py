@@ -0,0 +1,84 @@
+"""Per-phase tick timings.
+
+A `Profiler` attached to `Simulation.profiler` receives one sample (ms) per
+phase per tick: `input`, `ai`, `bombs`, `explosions` and the whole `step`,
+plus one `ai.<state>` sample per bot decision and, in the Tk game, `render`
+and `tick`. With no profiler attached the simulation only pays a `None` check
+per tick (and per bot decision).
+
+The last `window` samples of each phase feed the rolling p50/p95/p99; every
+sample is also appended, with its tick, to a bounded trace that can be
+written out as CSV or JSON.
+"""
+import csv
+import json
+import math
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+def percentile(sorted_values:List[float], q:float) -> float:
+    """Nearest-rank percentile of an ascending list (0 for an empty one)."""
+    if not sorted_values:
+        return 0.0
+    n = len(sorted_values)
+    return sorted_values[max(0, min(n - 1, math.ceil(q / 100.0 * n) - 1))]
+
+class Profiler:
+    def __init__(self, window:int=1000, trace_size:int=200000):
+        self.window = window
+        self.tick = 0        # set by the simulation at the start of each profiled step
+        self._samples: Dict[str, Deque[float]] = {}
+        self.trace: Deque[Tuple[int, str, float]] = deque(maxlen=trace_size)
+
+    def add(self, phase:str, ms:float):
+        q = self._samples.get(phase)
+        if q is None:
+            q = self._samples[phase] = deque(maxlen=self.window)
+        q.append(ms)
+        self.trace.append((self.tick, phase, ms))
+
+    def clear(self):
+        self._samples.clear()
+        self.trace.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Rolling count/mean/p50/p95/p99/max per phase."""
+        out = {}
+        for phase, q in self._samples.items():
+            vals = sorted(q)
+            out[phase] = {
+                'n': len(vals),
+                'mean': sum(vals) / len(vals) if vals else 0.0,
+                'p50': percentile(vals, 50),
+                'p95': percentile(vals, 95),
+                'p99': percentile(vals, 99),
+                'max': vals[-1] if vals else 0.0,
+            }
+        return out
+
+    def summary_lines(self) -> List[str]:
+        lines = [f"{'phase':<12}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for phase, s in sorted(self.stats().items()):
+            lines.append(f"{phase:<12}{s['p50']:7.3f}{s['p95']:7.3f}{s['p99']:7.3f}")
+        return lines
+
+    def dump_csv(self, path:str):
+        with open(path, "w", newline="") as fh:
+            wr = csv.writer(fh)
+            wr.writerow(("tick", "phase", "ms"))
+            for tick, phase, ms in self.trace:
+                wr.writerow((tick, phase, f"{ms:.6f}"))
+
+    def dump_json(self, path:str):
+        with open(path, "w") as fh:
+            json.dump({
+                'stats': self.stats(),
+                'trace': [{'tick': t, 'phase': p, 'ms': ms} for t, p, ms in self.trace],
+            }, fh)
+
+    def dump(self, path:str):
+        """Write the trace as JSON if `path` ends in .json, else as CSV."""
+        if path.lower().endswith(".json"):
+            self.dump_json(path)
+        else:
+            self.dump_csv(path)
@@ -1,133 +1,433 @@
+import time
 import tkinter as tk
-from typing import Any
-from .config import WINDOW_W, WINDOW_H, CELL
-from .utils import now_ms
+from typing import Any, Dict, List, Optional, Tuple
+from .config import WINDOW_W, WINDOW_H, HUD_H, CELL
 from .config import POWERUP_TYPES
-from .pathfinding import a_star_with_visited, dijkstra_with_visited, jps_simple_with_visited
+from .entities import Player
+
+TILE_COLORS = {0: "#202020", 1: "#a0522d", 2: "#444444"}
+POWERUP_COLORS = {"extra_bomb": "#6ee", "bomb_power": "#eec", "health": "#8f8"}
+# stacking order of the retained map layers, bottom to top (the HUD has its own canvas)
+LAYERS = ("tile", "bomb", "explosion", "bot", "player", "powerup", "pathviz", "profiler")
+PROFILER_REFRESH_FRAMES = 10   # overlay text is recomputed every N frames
+CHUNK_TILES = 16               # the tile layer is drawn into images of CHUNK_TILES x CHUNK_TILES tiles
+GRID_COLOR = "#111"
+ZOOM_CELLS = (9, 12, 18, 24, 36, 48, 72)   # tile sizes (px) the camera zooms between
+FOLLOW_MARGIN = 4              # tiles the camera keeps between the player and the view edge
+
+class Camera:
+    """The part of the map in view: top-left tile `x, y` at `cell` pixels per tile.
+
+    `follow` scrolls only when the target comes within `FOLLOW_MARGIN` tiles
+    of an edge and never past the map border.
+    """
+    def __init__(self, px_w:int, px_h:int, cell:int=CELL):
+        self.px_w, self.px_h = px_w, px_h
+        self.cell = cell
+        self.x = self.y = 0
+
+    def span(self) -> Tuple[int,int]:
+        """Whole tiles that fit across and down."""
+        return max(1, self.px_w // self.cell), max(1, self.px_h // self.cell)
+
+    def bounds(self, w:int, h:int) -> Tuple[int,int,int,int]:
+        """Tiles at least partly in view as (x0, y0, x1, y1), x1/y1 exclusive."""
+        c = self.cell
+        return self.x, self.y, min(w, self.x - (-self.px_w // c)), min(h, self.y - (-self.px_h // c))
+
+    def zoom(self, step:int) -> bool:
+        """Move `step` levels along `ZOOM_CELLS` (positive zooms in); False if already at the end."""
+        k = min(range(len(ZOOM_CELLS)), key=lambda i: abs(ZOOM_CELLS[i] - self.cell))
+        cell = ZOOM_CELLS[max(0, min(len(ZOOM_CELLS) - 1, k + step))]
+        changed = cell != self.cell
+        self.cell = cell
+        return changed
+
+    def follow(self, tx:int, ty:int, w:int, h:int) -> bool:
+        """Scroll to keep tile (tx, ty) in view on a w x h map; True if the view moved."""
+        cols, rows = self.span()
+        x, y = _scroll(self.x, tx, cols, w), _scroll(self.y, ty, rows, h)
+        moved = (x, y) != (self.x, self.y)
+        self.x, self.y = x, y
+        return moved
+
+def _scroll(pos:int, target:int, span:int, size:int) -> int:
+    margin = min(FOLLOW_MARGIN, (span - 1) // 2)
+    if target < pos + margin:
+        pos = target - margin
+    elif target > pos + span - 1 - margin:
+        pos = target - span + 1 + margin
+    return max(0, min(pos, size - span))
 
 class TkRenderer:
+    """Retained-mode canvas renderer with a scrolling, zoomable camera.
+
+    The map canvas shows the `Camera` view and scrolls over the map; the HUD
+    sits on its own canvas below it. Only what is in view has canvas items:
+    the tile layer (walls and floor) is painted into `PhotoImage` chunks of
+    `CHUNK_TILES` x `CHUNK_TILES` tiles, built as they scroll into view and
+    dropped when they leave it, and only tiles whose type changed (a soft
+    wall destroyed) are repainted. Bombs, explosions, power-ups, sprites and
+    path overlays outside the view are culled. Everything else is created
+    once and then only moved or recoloured, so per-frame work is bounded by
+    the screen, not the map. Tile changes arrive through
+    `GameMap.add_listener`, entity moves through
+    `Simulation.add_move_listener`; bombs, explosions and power-ups in view
+    are looked up in the simulation's tile indices (`SpatialIndex.within`)
+    and diffed by identity each frame. `frame_ms`/`avg_frame_ms` time each `draw`.
+    """
     def __init__(self, root:tk.Tk):
         self.root = root
-        self.canvas = tk.Canvas(root, width=WINDOW_W, height=WINDOW_H, bg="#111")
+        self.canvas = tk.Canvas(root, width=WINDOW_W, height=WINDOW_H - HUD_H, bg="#111", highlightthickness=0)
         self.canvas.pack()
+        self.hud = tk.Canvas(root, width=WINDOW_W, height=HUD_H, bg="#111", highlightthickness=0)
+        self.hud.pack()
+        self.camera = Camera(WINDOW_W, WINDOW_H - HUD_H)
+        self._game = None
+        self.frame_ms = 0.0
+        self.avg_frame_ms = 0.0
+        self.frames = 0
 
-    def draw(self, game: Any):
-        # game is expected to expose map, bots, players, bombs, explosions, msgs
+    # -- setup -------------------------------------------------------------
+    def attach(self, game: Any):
+        """Build the persistent items for `game` and subscribe to its changes."""
+        if self._game is not None:
+            self._game.map.remove_listener(self._on_tile_changed)
+            try:
+                self._game.move_listeners.remove(self._on_entity_moved)
+            except ValueError:
+                pass
         self.canvas.delete("all")
-        # draw tiles
-        for y in range(game.map.h):
-            for x in range(game.map.w):
-                left = x*CELL
-                top = y*CELL
-                tile = game.map.grid[y][x]
-                if tile.in_explosion:
-                    color = "#ffb26b"
-                elif tile.ttype == 2:
-                    color = "#444444"
-                elif tile.ttype == 1:
-                    color = "#a0522d"
+        self.hud.delete("all")
+        self._game = game
+        self._hud_cache: Dict[Any, Any] = {}
+        self._hud_published = -1
+        self._painted = bytearray(game.map.tiles)
+        # HUD items, text updated in place
+        hud_y = 8
+        self._hud_status = self.hud.create_text(8, hud_y, anchor="w", fill="#eee", font=("Consolas", 13), text="")
+        self._hud_msgs = [self.hud.create_text(8, hud_y + 22 + i*16, anchor="w", fill="#ddd", font=("Consolas", 11), text="") for i in range(4)]
+        ix = WINDOW_W - 48
+        pad = 6
+        self._hud_icon = self.hud.create_oval(ix+pad, hud_y-pad, ix+32-pad, hud_y+24-pad, fill="#fff", outline="#222", state="hidden")
+        self._hud_icon_label = self.hud.create_text(ix+16, hud_y+28, text="", fill="#ddd", font=("Consolas", 9), state="hidden")
+        self._hud_frame = self.hud.create_text(WINDOW_W - 64, hud_y + 22 + 3*16, anchor="e", fill="#888", font=("Consolas", 9), text="")
+        # tick profiler overlay, shown on demand over the top-left of the view
+        self._prof_bg = self.canvas.create_rectangle(4, 4, 4, 4, fill="#000", outline="#555", state="hidden", tags=("profiler",))
+        self._prof_text = self.canvas.create_text(10, 10, anchor="nw", fill="#9f9", font=("Consolas", 10), text="", state="hidden", tags=("profiler",))
+        self._prof_shown = False
+        self._prof_moved = False
+        self._reset_view()
+        game.map.add_listener(self._on_tile_changed)
+        game.add_move_listener(self._on_entity_moved)
+
+    def _reset_view(self):
+        """Drop every map item; the next `draw` rebuilds what is in view at the camera's zoom."""
+        for layer in LAYERS[:-1]:
+            self.canvas.delete(layer)
+        self.hud.delete("pathviz")
+        self._chunks: Dict[Tuple[int,int], Tuple[tk.PhotoImage, int]] = {}
+        self._dirty_tiles: Dict[Tuple[int,int], None] = {}
+        self._moved: Dict[int, Any] = {}
+        self._bombs: Dict[int, Tuple[Any, int]] = {}
+        self._explosions: Dict[int, Tuple[Any, List[int]]] = {}
+        self._powerups: Dict[int, Tuple[Any, int]] = {}
+        self._sprites: Dict[int, Tuple[Any, int, bool, str]] = {}  # id -> (entity, item, alive, kind), in view only
+        self._entity_count = -1
+        self._pathviz = None
+        self._view: Optional[Tuple[int,int,int,int]] = None
+        m = self._game.map
+        c = self.camera.cell
+        self.canvas.configure(scrollregion=(0, 0, m.w*c, m.h*c))
+
+    def zoom(self, step:int) -> bool:
+        """Zoom the camera `step` levels in (negative: out); True if the zoom changed."""
+        if not self.camera.zoom(step):
+            return False
+        if self._game is not None:
+            self._reset_view()
+        return True
+
+    def _in_view(self, x:int, y:int) -> bool:
+        x0, y0, x1, y1 = self._view
+        return x0 <= x < x1 and y0 <= y < y1
+
+    def _set_view(self, game: Any):
+        """Scroll to the camera and cull every layer against the new view."""
+        m = game.map
+        c = self.camera.cell
+        self._view = x0, y0, x1, y1 = self.camera.bounds(m.w, m.h)
+        self.canvas.xview_moveto(x0 / m.w)
+        self.canvas.yview_moveto(y0 / m.h)
+        chunks = {}
+        for cy in range(y0 // CHUNK_TILES, (y1 - 1) // CHUNK_TILES + 1):
+            for cx in range(x0 // CHUNK_TILES, (x1 - 1) // CHUNK_TILES + 1):
+                chunks[cx, cy] = self._chunks.pop((cx, cy), None) or self._build_chunk(m, cx, cy)
+        for _, item in self._chunks.values():
+            self.canvas.delete(item)
+        self._chunks = chunks
+        self._cull_sprites(game)
+        for _, items in self._explosions.values():
+            for item in items:
+                self.canvas.delete(item)
+        self._explosions = {}
+        self._pathviz = None
+        self.canvas.coords(self._prof_text, x0*c + 10, y0*c + 10)
+        self._prof_moved = True
+
+    def _build_chunk(self, m: Any, cx:int, cy:int) -> Tuple[tk.PhotoImage, int]:
+        c = self.camera.cell
+        tx, ty = cx*CHUNK_TILES, cy*CHUNK_TILES
+        tw, th = min(CHUNK_TILES, m.w - tx), min(CHUNK_TILES, m.h - ty)
+        img = tk.PhotoImage(master=self.root, width=tw*c, height=th*c)
+        img.put(GRID_COLOR, to=(0, 0, tw*c, th*c))
+        for y in range(ty, ty + th):
+            for x in range(tx, tx + tw):
+                self._paint_tile(m, img, x, y)
+        return img, self.canvas.create_image(tx*c, ty*c, image=img, anchor="nw", tags=("tile",))
+
+    def _paint_tile(self, m: Any, img: tk.PhotoImage, x:int, y:int):
+        c = self.camera.cell
+        i = y*m.w + x
+        left, top = (x % CHUNK_TILES) * c, (y % CHUNK_TILES) * c
+        # leave a one pixel grid line around each tile
+        img.put(TILE_COLORS.get(m.tiles[i], TILE_COLORS[0]), to=(left+1, top+1, left+c-1, top+c-1))
+        self._painted[i] = m.tiles[i]
+
+    def _on_tile_changed(self, x:int, y:int):
+        if (x // CHUNK_TILES, y // CHUNK_TILES) in self._chunks:
+            self._dirty_tiles[x, y] = None
+
+    def _on_entity_moved(self, e: Any):
+        if e.id in self._sprites or (self._view is not None and self._in_view(e.x, e.y)):
+            self._moved[e.id] = e
+
+    def _cull_sprites(self, game: Any):
+        self._entity_count = len(game.bots) + len(game.players)
+        # alive players and bots come from the entity index; dead players stay drawn
+        shown = game.entity_index.within(*self._view)
+        shown += [p for p in game.players if not p.alive and self._in_view(p.x, p.y)]
+        ids = set()
+        for e in shown:
+            ids.add(e.id)
+            entry = self._sprites.get(e.id)
+            if entry is None:
+                self._add_sprite(e, "player" if isinstance(e, Player) else "bot")
+            else:
+                self._place_sprite(entry[1], e)
+        for eid in [eid for eid in self._sprites if eid not in ids]:
+            self.canvas.delete(self._sprites.pop(eid)[1])
+
+    def _add_sprite(self, e: Any, kind:str):
+        if kind == "bot":
+            fill, outline = "#d54", "#900"
+        else:
+            fill, outline = ("#4f4" if e.alive else "#666"), "#060"
+        item = self.canvas.create_rectangle(0, 0, 0, 0, fill=fill, outline=outline, tags=(kind,))
+        self._place_sprite(item, e)
+        self._sprites[e.id] = (e, item, e.alive, kind)
+
+    def _place_sprite(self, item:int, e: Any):
+        c = self.camera.cell
+        left = e.x*c; top = e.y*c
+        margin = c // 6
+        self.canvas.coords(item, left+margin, top+margin, left+c-margin, top+c-margin)
+
+    # -- per frame ---------------------------------------------------------
+    def draw(self, game: Any):
+        # game is expected to expose map, bots, players, the bomb/explosion/power-up
+        # and entity indices, events and the simulation clock `now` (ms); drawing
+        # never mutates it
+        t0 = time.perf_counter()
+        if game is not self._game:
+            self.attach(game)
+        now = game.now
+        created = False
+        canvas = self.canvas
+        m = game.map
+        c = self.camera.cell
+        p = game.players[0]
+        if self.camera.follow(p.x, p.y, m.w, m.h) or self._view is None:
+            self._set_view(game)
+            created = True
+        elif len(game.bots) + len(game.players) != self._entity_count:
+            self._cull_sprites(game)
+            created = True
+        x0, y0, x1, y1 = self._view
+        # repaint tiles in view whose type changed; bomb and explosion
+        # notifications need nothing here, those are drawn as items on top
+        if self._dirty_tiles:
+            tiles, painted = m.tiles, self._painted
+            for (x, y) in self._dirty_tiles:
+                i = y*m.w + x
+                entry = self._chunks.get((x // CHUNK_TILES, y // CHUNK_TILES))
+                if entry is not None and tiles[i] != painted[i]:
+                    self._paint_tile(m, entry[0], x, y)
+            self._dirty_tiles.clear()
+        # bombs: shrink as the fuse burns down
+        live = {}
+        for b in game.bomb_index.within(x0, y0, x1, y1):
+            key = id(b)
+            entry = self._bombs.pop(key, None)
+            if entry is None:
+                entry = (b, canvas.create_oval(0, 0, 0, 0, fill="#ffdd55", outline="#ccaa22", tags=("bomb",)))
+                created = True
+            live[key] = entry
+            rem = max(0, b.explode_at - now)
+            scale = 0.45 + 0.5 * (rem / game.config.BOMB_FUSE_MS)
+            pad = int((1-scale) * c / 2)
+            left = b.x*c; top = b.y*c
+            canvas.coords(entry[1], left+pad, top+pad, left+c-pad, top+c-pad)
+        for _, item in self._bombs.values():
+            canvas.delete(item)
+        self._bombs = live
+        # explosions: one item per tile in view
+        live = {}
+        for exp in game.explosion_index.within(x0, y0, x1, y1):
+            key = id(exp)
+            entry = self._explosions.pop(key, None)
+            if entry is None:
+                items = []
+                for (ex,ey) in exp.positions:
+                    if x0 <= ex < x1 and y0 <= ey < y1:
+                        left = ex*c; top = ey*c
+                        items.append(canvas.create_rectangle(left, top, left+c, top+c, fill="#ff8c42", outline="#f97306", tags=("explosion",)))
+                entry = (exp, items)
+                created = created or bool(items)
+            live[key] = entry
+        for _, items in self._explosions.values():
+            for item in items:
+                canvas.delete(item)
+        self._explosions = live
+        # power-ups
+        live = {}
+        for pu in game.powerup_index.within(x0, y0, x1, y1):
+            key = id(pu)
+            entry = self._powerups.pop(key, None)
+            if entry is None:
+                left = pu.x * c; top = pu.y * c
+                pad = c // 4
+                color = POWERUP_COLORS.get(pu.type, "#fff")
+                entry = (pu, canvas.create_oval(left+pad, top+pad, left+c-pad, top+c-pad, fill=color, outline="#222", tags=("powerup",)))
+                created = True
+            live[key] = entry
+        for _, item in self._powerups.values():
+            canvas.delete(item)
+        self._powerups = live
+        # entities: move the ones that reported a move, cull the ones that left the view
+        for e in self._moved.values():
+            entry = self._sprites.get(e.id)
+            if entry is not None and self._in_view(e.x, e.y):
+                self._place_sprite(entry[1], e)
+            elif entry is not None:
+                canvas.delete(entry[1])
+                del self._sprites[e.id]
+            elif e.alive or isinstance(e, Player):
+                self._add_sprite(e, "player" if isinstance(e, Player) else "bot")
+                created = True
+        self._moved.clear()
+        for eid, (e, item, was_alive, kind) in list(self._sprites.items()):
+            if e.alive != was_alive:
+                if kind == "player":
+                    canvas.itemconfig(item, fill="#4f4" if e.alive else "#666")
+                    self._sprites[eid] = (e, item, e.alive, kind)
                 else:
-                    color = "#202020"
-                self.canvas.create_rectangle(left, top, left+CELL, top+CELL, fill=color, outline="#111")
-                if tile.bomb is not None:
-                    b = tile.bomb
-                    rem = max(0, b.explode_at - now_ms())
-                    scale = 0.45 + 0.5 * (rem / game.config.BOMB_FUSE_MS)
-                    pad = int((1-scale) * CELL / 2)
-                    self.canvas.create_oval(left+pad, top+pad, left+CELL-pad, top+CELL-pad, fill="#ffdd55", outline="#ccaa22")
-        # draw explosions
-        for exp in game.explosions:
-            for (ex,ey) in exp.positions:
-                left = ex*CELL; top = ey*CELL
-                self.canvas.create_rectangle(left, top, left+CELL, top+CELL, fill="#ff8c42", outline="#f97306")
-        # draw bots
-        for b in game.bots:
-            if not b.alive: continue
-            left = b.x*CELL; top = b.y*CELL
-            margin = 6
-            self.canvas.create_rectangle(left+margin, top+margin, left+CELL-margin, top+CELL-margin, fill="#d54", outline="#900")
-        # draw player
+                    canvas.delete(item)
+                    del self._sprites[eid]
+        # optional pathfinding visualization overlay
+        pv = getattr(game, 'pathviz', None)
+        if pv is not self._pathviz:
+            canvas.delete("pathviz")
+            self.hud.delete("pathviz")
+            self._pathviz = pv
+            if pv:
+                self._draw_pathviz(game, pv)
+                created = True
+        if created:
+            for layer in LAYERS[1:]:
+                canvas.tag_raise(layer)
+        self._draw_hud(game, now)
+        self.frame_ms = (time.perf_counter() - t0) * 1000.0
+        self.avg_frame_ms = self.frame_ms if self.frames == 0 else self.avg_frame_ms * 0.9 + self.frame_ms * 0.1
+        self.frames += 1
+
+    def _set_text(self, canvas: tk.Canvas, item:int, text:str):
+        key = (id(canvas), item)
+        if self._hud_cache.get(key) != text:
+            self._hud_cache[key] = text
+            canvas.itemconfig(item, text=text)
+
+    def _draw_hud(self, game: Any, now:int):
+        hud = self.hud
         p = game.players[0]
-        left = p.x*CELL; top = p.y*CELL
-        margin = 6
-        color = "#4f4" if p.alive else "#666"
-        self.canvas.create_rectangle(left+margin, top+margin, left+CELL-margin, top+CELL-margin, fill=color, outline="#060")
-        # HUD
-        hud_y = game.map.h * CELL + 8
-        hud_text = f"HP: {p.health}  Score: {p.score}  Bombs: {p.bombs_active}/{p.max_bombs}  Time: {int((now_ms()/1000))}s"
-        self.canvas.create_text(8, hud_y, anchor="w", fill="#eee", font=("Consolas", 13), text=hud_text)
-        # messages
-        if game.msgs:
-            for i, m in enumerate(reversed(game.msgs[-4:])):
-                self.canvas.create_text(8, hud_y + 22 + i*16, anchor="w", fill="#ddd", font=("Consolas", 11), text=m)
+        self._set_text(hud, self._hud_status, f"HP: {p.health}  Score: {p.score}  Bombs: {p.bombs_active}/{p.max_bombs}  Time: {int((now/1000))}s")
+        # event text is only built when a new event arrives
+        events = game.events
+        if events.published != self._hud_published:
+            self._hud_published = events.published
+            recent = events.texts(len(self._hud_msgs))[::-1]
+            for i, item in enumerate(self._hud_msgs):
+                self._set_text(hud, item, recent[i] if i < len(recent) else "")
         # transient power-up HUD icon (spawn or pickup feedback)
         lpi = getattr(game, 'last_powerup_icon', None)
-        if lpi is not None:
-            ptype, end_at = lpi
-            if end_at > now_ms():
-                # draw icon at right side of HUD
-                ix = WINDOW_W - 48
-                iy = hud_y
-                if ptype == "extra_bomb":
-                    icolor = "#6ee"
-                elif ptype == "bomb_power":
-                    icolor = "#eec"
-                elif ptype == "health":
-                    icolor = "#8f8"
-                else:
-                    icolor = "#fff"
-                pad = 6
-                self.canvas.create_oval(ix+pad, iy-pad, ix+32-pad, iy+24-pad, fill=icolor, outline="#222")
-                # small label
-                self.canvas.create_text(ix+16, iy+28, text=ptype.replace("_"," "), fill="#ddd", font=("Consolas", 9))
-        # update tile explosion flags
-        for y in range(game.map.h):
-            for x in range(game.map.w):
-                game.map.grid[y][x].in_explosion = False
-        for exp in game.explosions:
-            for (ex,ey) in exp.positions:
-                if game.map.in_bounds(ex,ey):
-                    game.map.grid[ey][ex].in_explosion = True
-
-        # draw power-ups
-        for pu in getattr(game, 'powerups', []):
-            left = pu.x * CELL; top = pu.y * CELL
-            # choose color by type
-            if pu.type == "extra_bomb":
-                color = "#6ee"
-            elif pu.type == "bomb_power":
-                color = "#eec"
-            elif pu.type == "health":
-                color = "#8f8"
+        icon = None
+        if lpi is not None and lpi[1] > now:
+            icon = lpi[0]
+        if self._hud_cache.get("icon") != icon:
+            self._hud_cache["icon"] = icon
+            if icon is None:
+                hud.itemconfig(self._hud_icon, state="hidden")
+                hud.itemconfig(self._hud_icon_label, state="hidden")
             else:
-                color = "#fff"
-            pad = CELL // 4
-            self.canvas.create_oval(left+pad, top+pad, left+CELL-pad, top+CELL-pad, fill=color, outline="#222")
+                hud.itemconfig(self._hud_icon, state="normal", fill=POWERUP_COLORS.get(icon, "#fff"))
+                hud.itemconfig(self._hud_icon_label, state="normal", text=icon.replace("_"," "))
+        sched = getattr(game, 'scheduler', None)
+        ai = f"  ai queue {sched.queue_depth} over {sched.overruns}" if sched is not None else ""
+        rates = f"  sim {game.sim_hz:.1f}Hz render {game.render_hz:.1f}Hz" if hasattr(game, 'sim_hz') else ""
+        self._set_text(hud, self._hud_frame, f"frame {self.avg_frame_ms:.2f}ms{rates}{ai}")
+        self._draw_profiler(game)
 
-        # optional pathfinding visualization overlay
-        pv = getattr(game, 'pathviz', None)
-        if pv:
-            # pv is expected to be a dict mapping algorithm name -> result dict
-            colors = {'a*':'#3366ff', 'dijkstra':'#33aa33', 'jps':'#ff6666'}
-            # Tkinter does not support alpha hex (RGBA). Use lighter solid colors for visited overlay.
-            alpha_colors = {'a*': '#dfeaff', 'dijkstra':'#eaffdf','jps':'#ffe7e7'}
-            offx = 0
-            for key, res in pv.items():
-                visited = res.get('visited', set()) or set()
-                # draw visited nodes faintly
-                for (vx,vy) in visited:
-                    left = vx*CELL; top = vy*CELL
-                    self.canvas.create_rectangle(left, top, left+CELL, top+CELL, fill=alpha_colors.get(key,'#ffffff22'), outline='')
-                # draw path as thicker line
-                path = res.get('path') or []
-                for (i, coord) in enumerate(path):
-                    px,py = coord
-                    left = px*CELL; top = py*CELL
-                    self.canvas.create_rectangle(left+6, top+6, left+CELL-6, top+CELL-6, fill=colors.get(key,'#fff'), outline='')
-            # draw metrics text on HUD area
-            hud_y = game.map.h * CELL + 8
-            tx = 160
-            for key, res in pv.items():
-                txt = f"{key}: nodes={res.get('nodes_explored',0)} time={int(res.get('time_ms',0))}ms"
-                self.canvas.create_text(tx, hud_y, anchor='w', fill='#eee', font=("Consolas",11), text=txt)
-                tx += 240
+    def _draw_profiler(self, game: Any):
+        show = bool(getattr(game, 'show_profiler', False))
+        toggled = show != self._prof_shown
+        if toggled:
+            self._prof_shown = show
+            state = "normal" if show else "hidden"
+            self.canvas.itemconfig(self._prof_bg, state=state)
+            self.canvas.itemconfig(self._prof_text, state=state)
+        if not show or (self.frames % PROFILER_REFRESH_FRAMES and not toggled and not self._prof_moved):
+            return
+        self._prof_moved = False
+        self._set_text(self.canvas, self._prof_text, "\n".join(game.tick_profiler.summary_lines()))
+        box = self.canvas.bbox(self._prof_text)
+        if box:
+            self.canvas.coords(self._prof_bg, box[0]-6, box[1]-6, box[2]+6, box[3]+6)
+
+    def _draw_pathviz(self, game: Any, pv: dict):
+        # pv is expected to be a dict mapping algorithm name -> result dict
+        colors = {'a*':'#3366ff', 'dijkstra':'#33aa33', 'jps':'#ff6666', 'jps+':'#b266ff', 'hpa':'#ff9933'}
+        # Tkinter does not support alpha hex (RGBA). Use lighter solid colors for visited overlay.
+        alpha_colors = {'a*': '#dfeaff', 'dijkstra':'#eaffdf','jps':'#ffe7e7','jps+':'#f1e6ff','hpa':'#fff0e0'}
+        c = self.camera.cell
+        pad = c // 6
+        for key, res in pv.items():
+            visited = res.get('visited', set()) or set()
+            # draw visited nodes faintly
+            for (vx,vy) in visited:
+                if not self._in_view(vx, vy):
+                    continue
+                left = vx*c; top = vy*c
+                self.canvas.create_rectangle(left, top, left+c, top+c, fill=alpha_colors.get(key,'#ffffff'), outline='', tags=("pathviz",))
+            # draw path as thicker line
+            path = res.get('path') or []
+            for (px, py) in path:
+                if not self._in_view(px, py):
+                    continue
+                left = px*c; top = py*c
+                self.canvas.create_rectangle(left+pad, top+pad, left+c-pad, top+c-pad, fill=colors.get(key,'#fff'), outline='', tags=("pathviz",))
+        # draw metrics text on the HUD
+        tx = 160
+        for key, res in pv.items():
+            txt = f"{key}: nodes={res.get('nodes_explored',0)} time={int(res.get('time_ms',0))}ms"
+            self.hud.create_text(tx, 8, anchor='w', fill='#eee', font=("Consolas",11), text=txt, tags=("pathviz",))
+            tx += 190
@@ -0,0 +1,149 @@
+"""Input recording and headless replay.
+
+A replay is everything needed to re-run a match exactly: the `Simulation`
+constructor arguments (map size, bot/player counts, map seed, RNG seed), the
+tick length and one input byte per player per tick (`PlayerInput.encode`). The
+file is a fixed struct header followed by the zlib-compressed input bytes, so a
+ten minute match is a few kilobytes. A digest of the final state is stored so a
+replay can tell whether it reproduced the recorded run.
+
+Usage:
+    python3 -m bomberman.replay match.bmr               # replay to the end
+    python3 -m bomberman.replay match.bmr --to-tick 900 # stop at tick 900
+    python3 -m bomberman.replay match.bmr --profile trace.csv
+"""
+import argparse
+import json
+import struct
+import sys
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from . import config
+from .profiler import Profiler
+from .simulation import Simulation
+
+MAGIC = b"BMRP"
+VERSION = 2
+# magic, version, flags, map_w, map_h, bots, players, map_seed, seed, tick_ms, ticks, digest
+_HEADER = struct.Struct("<4sBBHHIHqqHII")
+_HEADER_V1 = struct.Struct("<4sBBHHBBqqHII")   # bot and player counts were single bytes
+_HAS_MAP_SEED = 1
+
+@dataclass
+class Replay:
+    map_w: int
+    map_h: int
+    bot_count: int
+    player_count: int
+    map_seed: Optional[int]
+    seed: int
+    tick_ms: int = config.TICK_MS
+    inputs: bytes = b""
+    digest: int = 0   # state_digest() after the last tick, 0 if unknown
+
+    @property
+    def ticks(self) -> int:
+        return len(self.inputs) // self.player_count if self.player_count else 0
+
+    @classmethod
+    def from_sim(cls, sim:Simulation, tick_ms:int=config.TICK_MS) -> "Replay":
+        """Replay of everything `sim` has recorded so far (see `start_recording`)."""
+        if sim.input_log is None:
+            raise ValueError("simulation is not recording")
+        return cls(sim.map.w, sim.map.h, sim.bot_count, len(sim.players), sim.map_seed, sim.seed,
+                   tick_ms, bytes(sim.input_log), state_digest(sim))
+
+    def save(self, path:str):
+        flags = _HAS_MAP_SEED if self.map_seed is not None else 0
+        header = _HEADER.pack(MAGIC, VERSION, flags, self.map_w, self.map_h, self.bot_count, self.player_count,
+                              self.map_seed or 0, self.seed, self.tick_ms, self.ticks, self.digest)
+        with open(path, "wb") as fh:
+            fh.write(header)
+            fh.write(zlib.compress(self.inputs, 9))
+
+    @classmethod
+    def load(cls, path:str) -> "Replay":
+        with open(path, "rb") as fh:
+            data = fh.read()
+        if len(data) < 5 or data[:4] != MAGIC:
+            raise ValueError(f"{path}: not a replay file")
+        header = {1: _HEADER_V1, VERSION: _HEADER}.get(data[4])
+        if header is None:
+            raise ValueError(f"{path}: unsupported replay version {data[4]}")
+        if len(data) < header.size:
+            raise ValueError(f"{path}: truncated replay header")
+        magic, version, flags, w, h, bots, players, map_seed, seed, tick_ms, ticks, digest = header.unpack_from(data)
+        inputs = zlib.decompress(data[header.size:])
+        if len(inputs) != ticks * players:
+            raise ValueError(f"{path}: expected {ticks * players} input bytes, found {len(inputs)}")
+        return cls(w, h, bots, players, map_seed if flags & _HAS_MAP_SEED else None, seed, tick_ms, inputs, digest)
+
+def start_recording(sim:Simulation):
+    """Log `sim`'s per-tick inputs from now on; call before the first `step`."""
+    if sim.ticks:
+        raise ValueError("recording must start at tick 0")
+    sim.input_log = bytearray()
+
+def state_digest(sim:Simulation) -> int:
+    """CRC32 over the clock, tiles and combatants; equal runs give equal digests."""
+    crc = zlib.crc32(struct.pack("<qI", sim.now, sim.ticks))
+    crc = zlib.crc32(sim.map.tiles, crc)
+    for e in sim.players + sim.bots:
+        crc = zlib.crc32(struct.pack("<iiii?", e.id, e.x, e.y, e.health, e.alive), crc)
+    return crc
+
+def play(rep:Replay, to_tick:Optional[int]=None, profiler:Optional[Profiler]=None) -> Simulation:
+    """Re-run `rep` headlessly up to `to_tick` (default: the end) and return the simulation."""
+    sim = Simulation(rep.map_w, rep.map_h, bot_count=rep.bot_count, map_seed=rep.map_seed,
+                     seed=rep.seed, player_count=rep.player_count)
+    sim.profiler = profiler
+    n = rep.player_count
+    end = rep.ticks if to_tick is None else min(to_tick, rep.ticks)
+    inputs, data, step, dt = sim.inputs, rep.inputs, sim.step, rep.tick_ms
+    pos = 0
+    for _ in range(end):
+        for k in range(n):
+            inputs[k].decode(data[pos + k])
+        pos += n
+        step(dt)
+    return sim
+
+def summary(sim:Simulation) -> Dict[str, Any]:
+    return {
+        'tick': sim.ticks,
+        'sim_ms': sim.now,
+        'players': [{'id': p.id, 'pos': [p.x, p.y], 'health': p.health, 'alive': p.alive, 'score': p.score} for p in sim.players],
+        'bots': [{'id': b.id, 'pos': [b.x, b.y], 'state': b.state, 'alive': b.alive} for b in sim.bots],
+        'bombs': [[b.x, b.y, b.explode_at] for b in sim.bombs],
+        'soft_walls_destroyed': sim.soft_destroyed,
+        'digest': state_digest(sim),
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Re-run a recorded match headlessly.")
+    ap.add_argument("replay", help="replay file written by `python3 main.py --record`")
+    ap.add_argument("--to-tick", type=int, default=None, help="stop after this tick (default: end of recording)")
+    ap.add_argument("--profile", metavar="PATH", default=None, help="time every tick phase and write the trace to PATH (.csv or .json)")
+    args = ap.parse_args(argv)
+
+    rep = Replay.load(args.replay)
+    prof = Profiler() if args.profile else None
+    t0 = time.perf_counter()
+    sim = play(rep, args.to_tick, prof)
+    dt = time.perf_counter() - t0
+    if prof is not None:
+        prof.dump(args.profile)
+        print("\n".join(prof.summary_lines()), file=sys.stderr)
+    res = summary(sim)
+    if sim.ticks == rep.ticks and rep.digest:
+        res['digest_ok'] = res['digest'] == rep.digest
+    print(json.dumps(res))
+    print(f"{sim.ticks} ticks in {dt:.3f}s ({sim.ticks / dt if dt else 0:.0f} ticks/s)", file=sys.stderr)
+    if res.get('digest_ok') is False:
+        print("replay diverged from the recording", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
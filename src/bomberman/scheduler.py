@@ -0,0 +1,145 @@
+"""Time-budgeted scheduling of bot decisions.
+
+Bots used to think whenever their `think_interval_ms` ran out, so bots whose
+windows lined up all searched in the same tick. `AIScheduler` instead:
+
+- staggers the first think of each bot across one interval (`stagger`), so
+  think times stay spread out;
+- queues bots that are due and serves them urgent-first: bots standing in a
+  blast that lands within `BOT_DANGER_MS` (evade), then the longest waiting;
+- with `budget_ms` set, stops starting new decisions once the tick has spent
+  its budget; the rest stay queued for the next tick and keep walking their
+  current path. Evading bots are always served.
+- runs bombing-spot searches in slices of `slice_nodes` tiles, so an
+  expensive search can be paused at the budget and resumed next tick (the
+  bot waits in place meanwhile). A bot that comes into danger while its
+  search is paused drops the search and decides again.
+- hands bots listed by `sim.planner` to the lookahead planner (`planner.py`)
+  instead of acting on their state.
+
+Without a budget every due bot is served within the tick, so runs stay
+deterministic and no work is carried between ticks. A wall-clock budget makes
+decisions depend on machine speed, so recorded replays need it off.
+
+`stats()` reports queue depth, deferred decisions and budget overruns.
+"""
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+from . import config
+from .ai import BombingSpotSearch
+from .entities import Computer
+
+class AIScheduler:
+    def __init__(self, budget_ms:Optional[float]=None, slice_nodes:int=config.AI_SLICE_NODES):
+        self.budget_ms = budget_ms
+        self.slice_nodes = slice_nodes
+        self._queue: Dict[int, Tuple[int, Computer]] = {}       # bot id -> (due since ms, bot)
+        self._searches: Dict[int, BombingSpotSearch] = {}      # bot id -> paused search
+        # metrics
+        self.ticks = 0
+        self.served = 0          # decisions completed
+        self.resumed = 0         # slices run on a paused search
+        self.deferred = 0        # due bots left queued at the end of a tick (summed over ticks)
+        self.overruns = 0        # ticks that went over the budget
+        self.queue_depth = 0     # bots still queued after the last tick
+        self.max_queue_depth = 0
+        self.last_ms = 0.0       # time spent in the last update
+
+    def stagger(self, bots:List[Computer]):
+        """Spread the first think of `bots` evenly over one think interval."""
+        n = len(bots)
+        for k, b in enumerate(bots):
+            b.last_think = (k * b.think_interval_ms) // n - b.think_interval_ms
+
+    def update(self, sim:Any):
+        t0 = perf_counter()
+        now = sim.now
+        queue, searches = self._queue, self._searches
+        for bot in sim.bots:
+            if not bot.alive:
+                if bot.id in queue:
+                    del queue[bot.id]
+                    searches.pop(bot.id, None)
+                continue
+            if bot.id not in queue and now - bot.last_think >= bot.think_interval_ms:
+                queue[bot.id] = (now, bot)
+        busy = set()
+        if queue:
+            budget = self.budget_ms
+            # urgent first, then longest waiting; sort is stable so ties keep bot order
+            order = sorted(((not sim.in_danger(bot), since, bot) for since, bot in queue.values()), key=lambda e: e[:2])
+            for calm, _, bot in order:
+                if budget is not None and calm and (perf_counter() - t0) * 1000.0 >= budget:
+                    break
+                if self._serve(sim, bot, t0):
+                    del queue[bot.id]
+                    self.served += 1
+                busy.add(bot.id)
+        # everyone else keeps walking; a bot with a paused search waits for it
+        for bot in sim.bots:
+            if bot.alive and bot.id not in busy and bot.id not in searches:
+                sim.follow_path_step(bot)
+        self.ticks += 1
+        self.queue_depth = len(queue)
+        self.deferred += len(queue)
+        self.max_queue_depth = max(self.max_queue_depth, len(queue))
+        self.last_ms = (perf_counter() - t0) * 1000.0
+        if self.budget_ms is not None and self.last_ms > self.budget_ms:
+            self.overruns += 1
+
+    def _serve(self, sim:Any, bot:Computer, t0:float) -> bool:
+        """Run (or resume) `bot`'s decision; False if it was paused at the budget."""
+        prof = sim.profiler
+        t = perf_counter()
+        search = self._searches.pop(bot.id, None)
+        if search is not None and sim.in_danger(bot):
+            # a blast is coming: decide again (evade) instead of finishing the search
+            search = None
+        if search is None:
+            bot.last_think = sim.now
+            player = sim.decide(bot)
+            planner = sim.planner
+            if planner is not None and bot.id in planner.bots:
+                planner.think(sim, bot)
+            elif bot.state == "evade":
+                sim.evade(bot)
+            elif bot.state == "chase":
+                sim.chase(bot, player)
+            else:
+                search = BombingSpotSearch(sim.map, (bot.x, bot.y), config.SOFT_SEARCH_NODES)
+        else:
+            self.resumed += 1
+        if search is not None:
+            budget = self.budget_ms
+            if budget is None:
+                search.run()
+            else:
+                while not search.run(self.slice_nodes):
+                    if (perf_counter() - t0) * 1000.0 >= budget:
+                        self._searches[bot.id] = search
+                        if prof is not None:
+                            prof.add("ai.search", (perf_counter() - t) * 1000.0)
+                        return False
+            sim.search(bot, search.result)
+        if prof is not None:
+            prof.add("ai." + bot.state, (perf_counter() - t) * 1000.0)
+        return True
+
+    def clear(self):
+        """Drop queued bots and paused searches (e.g. after restoring a snapshot)."""
+        self._queue.clear()
+        self._searches.clear()
+        self.queue_depth = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'budget_ms': self.budget_ms,
+            'ticks': self.ticks,
+            'served': self.served,
+            'resumed': self.resumed,
+            'deferred': self.deferred,
+            'overruns': self.overruns,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'last_ms': round(self.last_ms, 3),
+        }
@@ -0,0 +1,243 @@
+"""Authoritative asyncio match server.
+
+The server owns one `Simulation` with `--slots` players and steps it every
+`--tick-ms` on a fixed schedule. Each TCP client gets a free player slot,
+sends `I` frames with its input and receives a welcome and a full state,
+then one delta frame per tick (see `netproto`). The delta body is encoded
+once per tick and shared by every client; only the 9-byte prefix carrying the
+client's input ack differs. Clients whose send buffer backs up beyond
+`--max-buffer` are dropped rather than slowing the tick down. When a match is
+over a new one starts (next seed) and every client gets a fresh full state.
+
+Tick timings (`step`, `delta`, `send`, whole `tick`) go to a `Profiler`;
+every `--report` seconds the server prints them with bytes sent per tick.
+
+Usage:
+    python3 -m bomberman.server --port 7777 --slots 300 --map-w 101 --map-h 101 --bots 20
+    PYTHONPATH=src python3 -m bomberman.netload --clients 300 --seconds 20
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from . import config
+from .netproto import (DeltaTracker, frame, read_frame, delta_frame, INPUT, WELCOME,
+                       MSG_INPUT, MSG_WELCOME, MSG_ERROR)
+from .profiler import Profiler
+from .simulation import Simulation
+
+@dataclass
+class _Client:
+    slot: int
+    writer: Any
+    ack: int = 0
+    synced: bool = False    # has received a full state of the current match
+
+class GameServer:
+    MAX_CATCH_UP = 5
+
+    def __init__(self, map_w:int=config.MAP_W, map_h:int=config.MAP_H, slots:int=8, bot_count:int=config.BOT_COUNT,
+                 seed:int=0, tick_ms:int=config.TICK_MS, max_buffer:int=1 << 20):
+        self.map_w, self.map_h = map_w, map_h
+        self.slots = slots
+        self.bot_count = bot_count
+        self.seed = seed
+        self.tick_ms = tick_ms
+        self.max_buffer = max_buffer
+        self.sim = self._new_match()
+        if len(self.sim.players) < slots:
+            raise ValueError(f"only {len(self.sim.players)} of {slots} player slots fit on a {map_w}x{map_h} map")
+        self.tracker = DeltaTracker(self.sim)
+        self.clients: Dict[int, _Client] = {}    # slot -> client
+        self.profiler = Profiler()
+        self.matches = 1
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.ticks = 0
+        self.late_ticks = 0
+        self.dropped = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _new_match(self) -> Simulation:
+        return Simulation(self.map_w, self.map_h, bot_count=self.bot_count, map_seed=self.seed, seed=self.seed, player_count=self.slots)
+
+    # -- connections -------------------------------------------------------
+    async def start(self, host:str="127.0.0.1", port:int=7777):
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def _handle(self, reader, writer):
+        slot = next((k for k in range(self.slots) if k not in self.clients), None)
+        if slot is None:
+            writer.write(frame(bytes((MSG_ERROR,)) + b"server full"))
+            await writer.drain()
+            writer.close()
+            return
+        client = _Client(slot, writer)
+        try:
+            player = self.sim.players[slot]
+            self.clients[slot] = client
+            writer.write(frame(WELCOME.pack(MSG_WELCOME, player.id, self.map_w, self.map_h, self.tick_ms)))
+            while True:
+                data = await read_frame(reader)
+                self.bytes_in += len(data) + 4
+                if data[0] != MSG_INPUT:
+                    continue
+                _, code, client.ack = INPUT.unpack(data)
+                inp = self.sim.inputs[slot]
+                # the held direction is replaced, a bomb request stays set until a tick applies it
+                bomb = inp.bomb
+                inp.decode(code)
+                inp.bomb = inp.bomb or bomb
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if self.clients.get(slot) is client:
+                del self.clients[slot]
+                self.sim.inputs[slot].decode(0)
+            writer.close()
+
+    # -- ticking -----------------------------------------------------------
+    def tick(self):
+        prof = self.profiler
+        prof.tick = self.ticks
+        t0 = time.perf_counter()
+        if self.sim.is_over():
+            self.seed += 1
+            self.matches += 1
+            inputs = self.sim.inputs
+            self.sim = self._new_match()
+            self.sim.inputs = inputs
+            self.tracker.attach(self.sim)
+            for c in self.clients.values():
+                c.synced = False
+        self.sim.step(self.tick_ms)
+        t1 = time.perf_counter()
+        body = self.tracker.delta()
+        full = None
+        t2 = time.perf_counter()
+        sent = 0
+        for c in list(self.clients.values()):
+            w = c.writer
+            if w.transport.get_write_buffer_size() > self.max_buffer:
+                self.dropped += 1
+                del self.clients[c.slot]
+                self.sim.inputs[c.slot].decode(0)
+                w.transport.abort()
+                continue
+            if c.synced:
+                bufs = delta_frame(c.ack, body)
+                w.writelines(bufs)
+                sent += len(bufs[0]) + len(body)
+            else:
+                if full is None:
+                    full = frame(self.tracker.full())
+                w.write(full)
+                sent += len(full)
+                c.synced = True
+        t3 = time.perf_counter()
+        self.ticks += 1
+        self.bytes_out += sent
+        prof.add("step", (t1 - t0) * 1000.0)
+        prof.add("delta", (t2 - t1) * 1000.0)
+        prof.add("send", (t3 - t2) * 1000.0)
+        prof.add("tick", (t3 - t0) * 1000.0)
+        prof.add("bytes", float(sent))
+        prof.add("body", float(len(body)))
+        if self.clients:
+            prof.add("client_bytes", sent / len(self.clients))
+
+    async def run(self, seconds:Optional[float]=None, report:float=0.0):
+        """Tick on a fixed schedule; late ticks run back to back to catch up, up to
+        `MAX_CATCH_UP` periods behind, after which the schedule is reset."""
+        loop = asyncio.get_running_loop()
+        period = self.tick_ms / 1000.0
+        start = next_t = loop.time()
+        next_report = start + report
+        while seconds is None or loop.time() - start < seconds:
+            self.tick()
+            next_t += period
+            delay = next_t - loop.time()
+            if delay < 0:
+                self.late_ticks += 1
+                if delay < -self.MAX_CATCH_UP * period:
+                    next_t = loop.time()
+            await asyncio.sleep(max(0.0, delay))
+            if report and loop.time() >= next_report:
+                next_report += report
+                print(self.report_line(), file=sys.stderr)
+
+    async def close(self):
+        for c in list(self.clients.values()):
+            c.writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def stats(self) -> Dict[str, Any]:
+        st = self.profiler.stats()
+        pick = lambda name: {k: round(v, 3) for k, v in st.get(name, {}).items()}
+        return {
+            'ticks': self.ticks,
+            'matches': self.matches,
+            'clients': len(self.clients),
+            'late_ticks': self.late_ticks,
+            'dropped': self.dropped,
+            'bytes_out': self.bytes_out,
+            'bytes_in': self.bytes_in,
+            'tick_ms': pick('tick'),
+            'step_ms': pick('step'),
+            'delta_ms': pick('delta'),
+            'send_ms': pick('send'),
+            'bytes_per_tick': pick('bytes'),
+            'bytes_per_client_tick': pick('client_bytes'),
+            'delta_body_bytes': pick('body'),
+        }
+
+    def report_line(self) -> str:
+        st = self.profiler.stats()
+        tick, out, body, per = st.get('tick', {}), st.get('bytes', {}), st.get('body', {}), st.get('client_bytes', {})
+        return (f"tick {self.ticks} clients {len(self.clients)} match {self.matches}: "
+                f"tick p50 {tick.get('p50', 0):.2f}ms p99 {tick.get('p99', 0):.2f}ms, "
+                f"out {out.get('mean', 0):.0f} B/tick ({per.get('mean', 0):.0f} per client, body {body.get('mean', 0):.0f}), "
+                f"late {self.late_ticks} dropped {self.dropped}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run an authoritative match server.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=7777)
+    ap.add_argument("--slots", type=int, default=8, help="player slots (one per client)")
+    ap.add_argument("--bots", type=int, default=config.BOT_COUNT)
+    ap.add_argument("--map-w", type=int, default=config.MAP_W)
+    ap.add_argument("--map-h", type=int, default=config.MAP_H)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--tick-ms", type=int, default=config.TICK_MS)
+    ap.add_argument("--max-buffer", type=int, default=1 << 20, help="drop clients with more unsent bytes than this")
+    ap.add_argument("--seconds", type=float, default=None, help="stop after this long (default: run until interrupted)")
+    ap.add_argument("--report", type=float, default=5.0, help="seconds between stats lines (0 = off)")
+    args = ap.parse_args(argv)
+
+    try:
+        server = GameServer(args.map_w, args.map_h, args.slots, args.bots, args.seed, args.tick_ms, args.max_buffer)
+    except ValueError as e:
+        ap.error(str(e))
+
+    async def serve():
+        await server.start(args.host, args.port)
+        print(f"serving {args.map_w}x{args.map_h}, {args.slots} slots, {args.bots} bots on {args.host}:{args.port}", file=sys.stderr)
+        try:
+            await server.run(args.seconds, args.report)
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.stats()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,521 @@
+"""Headless game simulation driven by a virtual clock.
+
+`Simulation` owns the map, entities and rules and has no Tk dependency. It is
+advanced explicitly with `step(dt_ms)`, so matches can run as fast as the CPU
+allows; the Tk `Game` is a thin adapter that feeds keyboard input and calls
+`step` from `root.after`.
+"""
+import functools
+import heapq
+import random
+from collections import deque
+from dataclasses import dataclass
+from time import perf_counter
+from typing import List, Optional, Tuple, Set, Dict, Callable
+from .entities import Entity, Bomberman, Player, Computer, Bomb, Explosion, PowerUp
+from .map import GameMap
+from .utils import manhattan
+from . import config
+from .ai import DistanceField, PathCache
+from .danger_analysis import DangerField
+from .events import EventLog, Message, BombPlaced, WallsDestroyed, PowerUpSpawned, PowerUpCollected, EntityHit, EntityKilled
+from .hpa import HPAGraph, hpa
+from .spatial import SpatialIndex
+from .profiler import Profiler
+from .scheduler import AIScheduler
+
+@dataclass
+class PlayerInput:
+    """Input for one player, consumed by the next `step`.
+
+    `dx`/`dy` is the held movement direction; `bomb` is a one-shot request that
+    is cleared once applied.
+    """
+    dx: int = 0
+    dy: int = 0
+    bomb: bool = False
+
+    def encode(self) -> int:
+        """Pack into one byte: bits 0-1 dx, bits 2-3 dy (two's complement), bit 4 bomb."""
+        return (self.dx & 3) | ((self.dy & 3) << 2) | (int(self.bomb) << 4)
+
+    def decode(self, b:int):
+        dx, dy = b & 3, (b >> 2) & 3
+        self.dx = dx - 4 if dx & 2 else dx
+        self.dy = dy - 4 if dy & 2 else dy
+        self.bomb = bool(b & 16)
+
+class Simulation:
+    """Game state and rules.
+
+    All randomness (bot spawns, bot decisions, power-up drops) comes from
+    `self.rng`, seeded with `seed`; with the same map seed, seed and per-tick
+    inputs a match plays out identically. When `input_log` is a bytearray,
+    `step` appends every player's input to it (see `replay.py`); when
+    `profiler` is set, each phase of `step` and each bot decision is timed.
+    Bot decisions are run by `scheduler` (staggered, evade first, optionally
+    time-budgeted), or by `planner` for the bots it plans for.
+    """
+    def __init__(self, map_w:int=config.MAP_W, map_h:int=config.MAP_H, bot_count:int=config.BOT_COUNT, map_seed:Optional[int]=0xBEEF, seed:Optional[int]=None, player_count:int=1):
+        self._init_state(GameMap(map_w, map_h, seed=map_seed), map_seed, seed, bot_count, player_count)
+        self.setup_entities()
+        self.inputs = [PlayerInput() for _ in self.players]
+
+    def _init_state(self, game_map:GameMap, map_seed:Optional[int], seed:Optional[int], bot_count:int, player_count:int):
+        """Set up an empty match on `game_map`; entities are added by `setup_entities` (or a snapshot)."""
+        self.config = config
+        self.map = game_map
+        self.map_seed = map_seed
+        self.danger = DangerField(self.map)
+        # an unseeded match still picks a concrete seed so it can be replayed
+        self.seed = seed if seed is not None else random.randrange(1 << 63)
+        self.rng = random.Random(self.seed)
+        self.bot_count = bot_count
+        self.player_count = player_count
+        self.players: List[Player] = []
+        self.bots: List[Computer] = []
+        self._bombs: Dict[int, Bomb] = {}            # id(bomb) -> bomb, in placement order
+        self._explosions: Dict[int, Explosion] = {}  # id(exp) -> explosion
+        # min-heaps of (due_ms, seq, object): bomb fuses and explosion expiry
+        self._bomb_timers: List[Tuple[int, int, Bomb]] = []
+        self._explosion_timers: List[Tuple[int, int, Explosion]] = []
+        self._timer_seq = 0
+        self._powerups: Dict[int, PowerUp] = {}   # id(pu) -> pu, in spawn order
+        self.entity_index = SpatialIndex(game_map.w)    # alive players and bots by tile
+        self.powerup_index = SpatialIndex(game_map.w)
+        self.bomb_index = SpatialIndex(game_map.w)
+        self.explosion_index = SpatialIndex(game_map.w)  # each explosion on every tile it covers
+        self.last_powerup_icon = None  # (type, end_at_ms)
+        self.next_id = 1
+        self.events = EventLog()
+        self.now = 0      # virtual clock (ms)
+        self.ticks = 0
+        self.soft_destroyed = 0
+        self.move_listeners: List[Callable[[Entity], None]] = []
+        self._fields: Dict[Tuple[int,int], DistanceField] = {}
+        self._fields_version = -1
+        self.path_cache = PathCache(config.PATH_CACHE_SIZE)
+        if game_map.w * game_map.h >= config.HPA_MIN_CELLS:
+            # flat A* across a huge map can expand most of it; search block by block
+            self.path_cache.search = functools.partial(hpa, graph=HPAGraph(game_map))
+        self.input_log: Optional[bytearray] = None   # one byte per player per tick while recording
+        self.profiler: Optional[Profiler] = None      # per-phase timings when set
+        self.scheduler = AIScheduler()
+        self.planner = None    # lookahead planner for some bots (see `planner.py`)
+        self.inputs: List[PlayerInput] = []
+
+    def __getstate__(self):
+        # listeners belong to front-ends and the config module is not picklable
+        state = self.__dict__.copy()
+        del state['config']
+        state['move_listeners'] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.config = config
+        # containers keyed by id() must be re-keyed for the copied objects
+        self._bombs = {id(b): b for b in self._bombs.values()}
+        self._explosions = {id(e): e for e in self._explosions.values()}
+        self._powerups = {id(p): p for p in self._powerups.values()}
+        self.danger.rebuild(self.bombs)
+
+    def snapshot(self) -> bytes:
+        """Whole match state as bytes (see `snapshot.py`)."""
+        from .snapshot import snapshot
+        return snapshot(self)
+
+    def restore(self, data:bytes):
+        from .snapshot import restore
+        restore(self, data)
+
+    def clone(self) -> "Simulation":
+        """Independent copy for lookahead; listeners and caches are not carried over."""
+        from .snapshot import clone
+        return clone(self)
+
+    def setup_entities(self):
+        # player 1 starts in the cleared top-left corner, player 2 in the bottom-right
+        # one; any further players (network matches) on random free tiles
+        rng = self.rng
+        starts = [(1, 1), (self.map.w-2, self.map.h-2)][:self.player_count]
+        taken = set(starts)
+        tries = 0
+        while len(starts) < self.player_count and tries < 100 * self.player_count:
+            tries += 1
+            x = rng.randint(1, self.map.w-2)
+            y = rng.randint(1, self.map.h-2)
+            if (x,y) in taken or self.map.ttype(x,y) != 0: continue
+            starts.append((x,y))
+            taken.add((x,y))
+        for (x,y) in starts:
+            p = Player(x=x, y=y, id=self._gen_id(), health=config.PLAYER_HEALTH, max_bombs=config.PLAYER_MAX_BOMBS, bomb_power=config.BOMB_POWER)
+            self.players.append(p)
+        tries = 0
+        positions = []
+        while len(positions) < self.bot_count and tries < 1000:
+            tries += 1
+            x = rng.randint(1, self.map.w-2)
+            y = rng.randint(1, self.map.h-2)
+            if (x,y) in taken: continue
+            if self.map.ttype(x,y) != 0: continue
+            positions.append((x,y))
+        for pos in positions:
+            b = Computer(x=pos[0], y=pos[1], id=self._gen_id(), health=config.BOT_HEALTH, max_bombs=config.BOT_MAX_BOMBS, bomb_power=config.BOMB_POWER)
+            self.bots.append(b)
+        self.scheduler.stagger(self.bots)
+        for e in self.players + self.bots:
+            self.entity_index.add(e, e.x, e.y)
+
+    def _gen_id(self) -> int:
+        nid = self.next_id
+        self.next_id += 1
+        return nid
+
+    def add_move_listener(self, fn:Callable[[Entity], None]):
+        """Call `fn(entity)` after every player or bot move."""
+        self.move_listeners.append(fn)
+
+    @property
+    def bombs(self):
+        return self._bombs.values()
+
+    @property
+    def explosions(self):
+        return self._explosions.values()
+
+    @property
+    def powerups(self):
+        return self._powerups.values()
+
+    def move_entity(self, e:Entity, x:int, y:int):
+        self.entity_index.move(e, e.x, e.y, x, y)
+        e.x, e.y = x, y
+        for fn in self.move_listeners:
+            fn(e)
+
+    def add_msg(self, text:str):
+        """Publish a free-text `Message` event (front-end notes)."""
+        self.events.publish(Message, self.ticks, text)
+
+    @property
+    def msgs(self) -> List[str]:
+        """Text of the last `MSG_HISTORY` events, oldest first."""
+        return self.events.texts(config.MSG_HISTORY)
+
+    @property
+    def last_msg(self) -> str:
+        last = self.events.last
+        return str(last) if last is not None else ""
+
+    def step(self, dt_ms:int=config.TICK_MS):
+        """Advance the simulation by `dt_ms` of virtual time (one tick)."""
+        self.now += dt_ms
+        self.ticks += 1
+        if self.input_log is not None:
+            self.input_log.extend(inp.encode() for inp in self.inputs)
+        prof = self.profiler
+        if prof is None:
+            self.handle_input()
+            self.update_ai()
+            self.process_bombs()
+            self.prune_explosions()
+            return
+        prof.tick = self.ticks
+        t0 = perf_counter()
+        self.handle_input()
+        t1 = perf_counter()
+        self.update_ai()
+        t2 = perf_counter()
+        self.process_bombs()
+        t3 = perf_counter()
+        self.prune_explosions()
+        t4 = perf_counter()
+        add = prof.add
+        add("input", (t1 - t0) * 1000.0)
+        add("ai", (t2 - t1) * 1000.0)
+        add("bombs", (t3 - t2) * 1000.0)
+        add("explosions", (t4 - t3) * 1000.0)
+        add("step", (t4 - t0) * 1000.0)
+
+    def alive_count(self) -> int:
+        return sum(1 for e in self.players if e.alive) + sum(1 for b in self.bots if b.alive)
+
+    def is_over(self) -> bool:
+        """True once at most one combatant (player or bot) is left alive."""
+        return self.alive_count() <= 1
+
+    def handle_input(self):
+        for p, inp in zip(self.players, self.inputs):
+            if inp.bomb:
+                inp.bomb = False
+                self.place_bomb(p)
+            if not p.alive: continue
+            if inp.dx != 0 or inp.dy != 0:
+                nx,ny = p.x + inp.dx, p.y + inp.dy
+                if self.map.in_bounds(nx,ny) and self.map.is_walkable(nx,ny):
+                    self.move_entity(p, nx, ny)
+                    # check pickups
+                    taken = self.collect_powerups_at(p.x, p.y)
+                    for pu in taken:
+                        self.apply_powerup(p, pu)
+
+    def place_bomb(self, owner:Bomberman) -> bool:
+        if not owner.can_place():
+            return False
+        x,y = owner.x, owner.y
+        if self.map.bomb_at(x,y) is not None:
+            return False
+        explosion_time = self.now + config.BOMB_FUSE_MS
+        bomb = Bomb(x=x, y=y, owner=owner, explode_at=explosion_time, power=owner.bomb_power)
+        self._bombs[id(bomb)] = bomb
+        self._timer_seq += 1
+        heapq.heappush(self._bomb_timers, (bomb.explode_at, self._timer_seq, bomb))
+        self.map.set_bomb(x,y,bomb)
+        self.bomb_index.add(bomb, x, y)
+        self.danger.add_bomb(bomb)
+        owner.bombs_active += 1
+        self.events.publish(BombPlaced, self.ticks, owner.id, x, y)
+        return True
+
+    def process_bombs(self):
+        """Detonate the bombs whose fuse has run out; cost scales with bombs due."""
+        timers = self._bomb_timers
+        now = self.now
+        while timers and timers[0][0] <= now:
+            bomb = heapq.heappop(timers)[2]
+            # chain-detonated bombs leave stale entries behind
+            if not bomb.exploded:
+                self.explode_bomb(bomb)
+
+    def explode_bomb(self, bomb:Bomb):
+        """Detonate `bomb` and the whole chain it sets off, one bomb at a time."""
+        if bomb.exploded: return
+        bomb.exploded = True
+        work = deque([bomb])
+        done: List[Bomb] = []
+        walls: List[Tuple[int,int]] = []
+        while work:
+            b = work.popleft()
+            done.append(b)
+            self._detonate(b, work, walls)
+        # the danger field is brought up to date once for the whole cascade
+        self.danger.remove_bombs(done)
+        if walls:
+            self.danger.walls_destroyed(walls)
+
+    def _detonate(self, bomb:Bomb, work:deque, walls:List[Tuple[int,int]]):
+        self.map.set_bomb(bomb.x, bomb.y, None)
+        self._bombs.pop(id(bomb), None)
+        self.bomb_index.remove(bomb, bomb.x, bomb.y)
+        bomb.owner.bombs_active = max(0, bomb.owner.bombs_active - 1)
+        positions: Set[Tuple[int,int]] = {(bomb.x, bomb.y)}
+        m = self.map
+        w, h, tiles = m.w, m.h, m.tiles
+        for dx,dy in [(1,0),(-1,0),(0,1),(0,-1)]:
+            for step in range(1, bomb.power+1):
+                nx = bomb.x + dx*step
+                ny = bomb.y + dy*step
+                if not (0 <= nx < w and 0 <= ny < h):
+                    break
+                i = ny*w + nx
+                t = tiles[i]
+                if t == 2:
+                    break
+                positions.add((nx,ny))
+                if m.bomb_idx[i] >= 0:
+                    other = m.bomb_table[m.bomb_idx[i]]
+                    if not other.exploded:
+                        other.exploded = True
+                        work.append(other)
+                if t == 1:
+                    break
+        destroyed = 0
+        destroyed_positions = []
+        for (x,y) in list(positions):
+            if self.map.destroy_soft(x,y):
+                walls.append((x,y))
+                destroyed += 1
+                destroyed_positions.append((x,y))
+        self.soft_destroyed += destroyed
+        if destroyed:
+            self.events.publish(WallsDestroyed, self.ticks, destroyed)
+            # spawn power-ups on some destroyed tiles
+            rng = self.rng
+            for (dx,dy) in destroyed_positions:
+                if rng.random() < self.config.POWERUP_SPAWN_CHANCE:
+                    ptype = rng.choice(self.config.POWERUP_TYPES)
+                    pu = PowerUp(x=dx, y=dy, type=ptype)
+                    self._powerups[id(pu)] = pu
+                    self.powerup_index.add(pu, pu.x, pu.y)
+                    # show transient HUD icon
+                    self.last_powerup_icon = (ptype, self.now + 1800)
+                    self.events.publish(PowerUpSpawned, self.ticks, ptype, dx, dy)
+        hit = [e for (x,y) in positions if 0 <= x < w and 0 <= y < h for e in self.entity_index.at(x,y)]
+        for p in hit:
+            if isinstance(p, Player) and p.alive:
+                p.health -= 1
+                self.events.publish(EntityHit, self.ticks, p.id, p.health)
+                if p.health <= 0:
+                    p.alive = False
+                    self.entity_index.remove(p, p.x, p.y)
+                    if bomb.owner is not p:
+                        bomb.owner.kills += 1
+                    self.events.publish(EntityKilled, self.ticks, p.id, bomb.owner.id, True)
+        for b in hit:
+            if isinstance(b, Computer) and b.alive:
+                b.health -= 1
+                if b.health <= 0:
+                    b.alive = False
+                    self.entity_index.remove(b, b.x, b.y)
+                    if bomb.owner is not b:
+                        bomb.owner.kills += 1
+                    if hasattr(bomb.owner, 'score'):
+                        if isinstance(bomb.owner, Player):
+                            bomb.owner.score += 100
+                    self.events.publish(EntityKilled, self.ticks, b.id, bomb.owner.id, False)
+        exp = Explosion(positions=positions, end_at=self.now + config.EXPLOSION_MS)
+        self._explosions[id(exp)] = exp
+        for (x,y) in positions:
+            self.explosion_index.add(exp, x, y)
+        self._timer_seq += 1
+        heapq.heappush(self._explosion_timers, (exp.end_at, self._timer_seq, exp))
+        self.map.add_explosion(positions)
+
+    def prune_explosions(self):
+        timers = self._explosion_timers
+        now = self.now
+        if not timers or timers[0][0] > now:
+            return
+        # a chain's explosions expire together; clear their tiles in one batch
+        cleared: List[Tuple[int,int]] = []
+        while timers and timers[0][0] <= now:
+            exp = heapq.heappop(timers)[2]
+            del self._explosions[id(exp)]
+            for (x,y) in exp.positions:
+                self.explosion_index.remove(exp, x, y)
+            cleared.extend(exp.positions)
+        self.map.clear_explosion(cleared)
+
+    def apply_powerup(self, player: Player, pu: PowerUp):
+        # apply immediate effects
+        if pu.type == "extra_bomb":
+            player.max_bombs += 1
+        elif pu.type == "bomb_power":
+            player.bomb_power += 1
+        elif pu.type == "health":
+            player.health = min(self.config.PLAYER_HEALTH, player.health + 1)
+        self.events.publish(PowerUpCollected, self.ticks, player.id, pu.type)
+        # transient HUD icon for collection
+        self.last_powerup_icon = (pu.type, self.now + 1800)
+
+    def collect_powerups_at(self, x:int, y:int):
+        # return any powerups at (x,y) and remove them
+        taken = self.powerup_index.at(x, y)
+        if not taken:
+            return []
+        for pu in taken:
+            self.powerup_index.remove(pu, x, y)
+            self._powerups.pop(id(pu), None)
+        return list(taken)
+
+    # AI helpers
+    def nearest_player(self, bot:Computer) -> Optional[Player]:
+        best = None
+        bestd = 10**9
+        for p in self.players:
+            if not p.alive: continue
+            d = manhattan((bot.x,bot.y),(p.x,p.y))
+            if d < bestd:
+                bestd = d
+                best = p
+        return best
+
+    def distance_field(self, goal:Tuple[int,int]) -> DistanceField:
+        """Shared distance field towards `goal`, rebuilt only after the map changes."""
+        if self._fields_version != self.map.version:
+            self._fields.clear()
+            self._fields_version = self.map.version
+        field = self._fields.get(goal)
+        if field is None:
+            field = DistanceField(self.map, goal, config.CHASE_FIELD_RADIUS)
+            self._fields[goal] = field
+            # keep only fields for goals still being chased
+            if len(self._fields) > 4 * max(1, len(self.players)):
+                self._fields = {goal: field}
+        return field
+
+    def update_ai(self):
+        """Let the scheduler run this tick's bot decisions (see `AIScheduler`)."""
+        self.scheduler.update(self)
+
+    def in_danger(self, bot:Computer) -> bool:
+        return self.danger.detonate_at[bot.y*self.map.w + bot.x] <= self.now + config.BOT_DANGER_MS
+
+    def decide(self, bot:Computer) -> Optional[Player]:
+        """Set `bot.state` and `bot.target`; returns the nearest player (or None)."""
+        player = self.nearest_player(bot)
+        if self.in_danger(bot):
+            bot.state = "evade"
+        elif player is not None and manhattan((bot.x,bot.y),(player.x,player.y)) <= bot.vision:
+            bot.state = "chase"
+            bot.target = (player.x, player.y)
+        else:
+            bot.state = "search"
+            bot.target = None
+        return player
+
+    def evade(self, bot:Computer):
+        # route that clears each tile before its blast arrives
+        path = self.danger.escape_path((bot.x,bot.y), self.now, config.TICK_MS)
+        if path:
+            bot.path = path
+            self.follow_path_step(bot)
+        else:
+            self.random_move(bot)
+
+    def chase(self, bot:Computer, player:Player):
+        field = self.distance_field((player.x,player.y))
+        path = field.path_from((bot.x,bot.y))
+        if path is None and not field.complete:
+            # the capped field does not reach the bot: fall back to a cached point-to-point search
+            path = self.path_cache.find(self.map, (bot.x,bot.y), (player.x,player.y))
+        if path and len(path) > 0:
+            bot.path = path
+            if manhattan((bot.x,bot.y),(player.x,player.y)) <= 2 and bot.can_place():
+                if self.rng.random() < 0.3:
+                    self.place_bomb(bot)
+            self.follow_path_step(bot)
+        else:
+            self.random_move(bot)
+
+    def search(self, bot:Computer, found:Optional[Tuple[Tuple[int,int], List[Tuple[int,int]]]]):
+        """Act on a finished bombing-spot search (`nearest_bombing_spot` result)."""
+        if found:
+            spot, path = found
+            bot.target = spot
+            bot.path = path
+            if not path and bot.can_place() and self.rng.random() < 0.6:
+                self.place_bomb(bot)
+            self.follow_path_step(bot)
+            return
+        self.random_move(bot)
+
+    def follow_path_step(self, bot:Computer):
+        if not bot.path:
+            return
+        nx,ny = bot.path[0]
+        if self.map.is_walkable(nx,ny):
+            self.move_entity(bot, nx, ny)
+            bot.path.pop(0)
+        else:
+            bot.path = []
+
+    def random_move(self, bot:Computer):
+        dirs = [(1,0),(-1,0),(0,1),(0,-1)]
+        self.rng.shuffle(dirs)
+        for dx,dy in dirs:
+            nx,ny = bot.x + dx, bot.y + dy
+            if self.map.in_bounds(nx,ny) and self.map.is_walkable(nx,ny):
+                self.move_entity(bot, nx, ny)
+                return
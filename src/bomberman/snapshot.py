@@ -0,0 +1,314 @@
+"""Binary snapshots of a `Simulation`.
+
+`snapshot(sim)` packs the full match state into one `bytes` buffer with
+`struct`/`array`: the tile and explosion planes, RNG state, players and bots
+(bot paths included), pending inputs, bombs (owner stored as an entity id),
+explosions and power-ups. `restore(sim, data)` loads it back into an existing
+simulation, keeping entity objects (and so renderer sprites) where ids match;
+`from_snapshot(data)` builds a fresh one. Equal states give equal bytes.
+Derived state (walk plane, bomb slots,
+danger field, spatial indices, timer heaps) is rebuilt, caches start empty and
+the event log is not saved. Work the AI scheduler had queued or paused (only
+possible with a time budget) is dropped; those bots simply think again.
+
+`clone(sim)` copies the state object-to-object without going through bytes;
+it is the cheap copy meant for lookahead search.
+
+Benchmark against `copy.deepcopy` and `pickle`:
+    python3 -m bomberman.snapshot --ticks 400 --repeat 200
+"""
+import argparse
+import copy
+import heapq
+import pickle
+import struct
+import time
+from array import array
+from itertools import compress
+from typing import List, Tuple
+from . import config
+from .entities import Player, Computer, Bomb, Explosion, PowerUp
+from .map import GameMap
+from .simulation import Simulation, PlayerInput
+
+MAGIC = b"BMSN"
+VERSION = 1
+# magic, version, flags, w, h, bot_count, player_count, map_seed, seed, now, ticks,
+# next_id, soft_destroyed, map_version, players, bots, bombs, explosions, powerups,
+# power-up icon type (-1 none), icon end
+_HEAD = struct.Struct("<4sBBHHHHqqqqIIQHHIIIbq")
+_HAS_MAP_SEED = 1
+_HAS_GAUSS = 2
+_RNG = struct.Struct("<625Id")      # Mersenne Twister words + position, gauss_next
+# kind, id, x, y, health, max_bombs, bomb_power, bombs_active, alive, score, kills
+_ENT = struct.Struct("<BIhhiiii?ii")
+# vision, state, target x/y (-1 none), last_think, think_interval_ms, path length
+_BOT = struct.Struct("<iBhhqiH")
+_BOMB = struct.Struct("<hhIqi")      # x, y, owner id, explode_at, power
+_EXP = struct.Struct("<qH")          # end_at, cell count (then x,y pairs)
+_PU = struct.Struct("<hhB")          # x, y, type index
+_STATES = ("search", "chase", "evade")
+_WALKABLE = bytes([1]) + bytes(255)  # tile type -> walk plane value (before bombs)
+_SOFT = bytes([0, 1]) + bytes(254)
+
+def snapshot(sim:Simulation) -> bytes:
+    m = sim.map
+    ptypes = config.POWERUP_TYPES
+    rng_version, mt, gauss = sim.rng.getstate()
+    icon = sim.last_powerup_icon
+    flags = (_HAS_MAP_SEED if sim.map_seed is not None else 0) | (_HAS_GAUSS if gauss is not None else 0)
+    out = [
+        _HEAD.pack(MAGIC, VERSION, flags, m.w, m.h, sim.bot_count, sim.player_count, sim.map_seed or 0, sim.seed,
+                   sim.now, sim.ticks, sim.next_id, sim.soft_destroyed, m.version, len(sim.players), len(sim.bots),
+                   len(sim._bombs), len(sim._explosions), len(sim._powerups),
+                   ptypes.index(icon[0]) if icon else -1, icon[1] if icon else 0),
+        _RNG.pack(*mt, gauss or 0.0),
+        bytes(m.tiles),
+        bytes(m.explosion),
+        bytes(inp.encode() for inp in sim.inputs),
+    ]
+    for kind, group in ((0, sim.players), (1, sim.bots)):
+        for e in group:
+            out.append(_ENT.pack(kind, e.id, e.x, e.y, e.health, e.max_bombs, e.bomb_power, e.bombs_active, e.alive, e.score, e.kills))
+            if kind:
+                tx, ty = e.target if e.target else (-1, -1)
+                out.append(_BOT.pack(e.vision, _STATES.index(e.state), tx, ty, e.last_think, e.think_interval_ms, len(e.path)))
+                out.append(array('h', [c for p in e.path for c in p]).tobytes())
+    for b in sim.bombs:
+        out.append(_BOMB.pack(b.x, b.y, b.owner.id, b.explode_at, b.power))
+    for exp in sim.explosions:
+        out.append(_EXP.pack(exp.end_at, len(exp.positions)))
+        out.append(array('h', [c for p in sorted(exp.positions) for c in p]).tobytes())
+    for pu in sim.powerups:
+        out.append(_PU.pack(pu.x, pu.y, ptypes.index(pu.type)))
+    return b"".join(out)
+
+def restore(sim:Simulation, data:bytes):
+    """Load `data` into `sim`; entity objects with matching ids are updated in place."""
+    head = _HEAD.unpack_from(data)
+    magic, version, flags, w, h = head[:5]
+    if magic != MAGIC:
+        raise ValueError("not a simulation snapshot")
+    if version != VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+    if (w, h) != (sim.map.w, sim.map.h):
+        raise ValueError(f"snapshot is {w}x{h}, simulation map is {sim.map.w}x{sim.map.h}")
+    (bot_count, player_count, map_seed, seed, now, ticks, next_id, soft_destroyed, map_version,
+     n_players, n_bots, n_bombs, n_exps, n_pus, icon_type, icon_end) = head[5:]
+    pos = _HEAD.size
+    rng = _RNG.unpack_from(data, pos)
+    pos += _RNG.size
+    m = sim.map
+    n = w * h
+    old_version = m.version
+    # map planes; bombs are placed again below
+    m.bomb_idx[:] = array('i', [-1]) * n
+    m.bomb_table.clear()
+    m._free_slots.clear()
+    m.tiles[:] = data[pos:pos+n]
+    pos += n
+    m.explosion[:] = data[pos:pos+n]
+    pos += n
+    m.walk[:] = m.tiles.translate(_WALKABLE)
+    m.soft_cells = _soft_cells(m.tiles)
+    sim.map_seed = map_seed if flags & _HAS_MAP_SEED else None
+    sim.seed = seed
+    sim.bot_count = bot_count
+    sim.player_count = player_count
+    sim.rng.setstate((3, tuple(rng[:625]), rng[625] if flags & _HAS_GAUSS else None))
+    sim.now, sim.ticks, sim.next_id, sim.soft_destroyed = now, ticks, next_id, soft_destroyed
+    sim.last_powerup_icon = (config.POWERUP_TYPES[icon_type], icon_end) if icon_type >= 0 else None
+    inputs = []
+    for k in range(n_players):
+        inp = sim.inputs[k] if k < len(sim.inputs) else PlayerInput()
+        inp.decode(data[pos + k])
+        inputs.append(inp)
+    sim.inputs = inputs
+    pos += n_players
+    # entities, reusing objects by id
+    known = {e.id: e for e in sim.players + sim.bots}
+    by_id = {}
+    groups: Tuple[List[Player], List[Computer]] = ([], [])
+    for _ in range(n_players + n_bots):
+        kind, eid, x, y, health, max_bombs, power, active, alive, score, kills = _ENT.unpack_from(data, pos)
+        pos += _ENT.size
+        cls = Computer if kind else Player
+        e = known.get(eid)
+        if type(e) is not cls:
+            e = cls(x=x, y=y, id=eid, health=health)
+        e.x, e.y, e.health, e.max_bombs, e.bomb_power = x, y, health, max_bombs, power
+        e.bombs_active, e.alive, e.score, e.kills = active, alive, score, kills
+        if kind:
+            vision, state, tx, ty, last_think, interval, plen = _BOT.unpack_from(data, pos)
+            pos += _BOT.size
+            e.vision, e.state, e.last_think, e.think_interval_ms = vision, _STATES[state], last_think, interval
+            e.target = (tx, ty) if tx >= 0 else None
+            coords = array('h')
+            coords.frombytes(data[pos:pos + 4*plen])
+            pos += 4*plen
+            e.path = list(zip(coords[0::2], coords[1::2]))
+        by_id[eid] = e
+        groups[kind].append(e)
+    sim.players, sim.bots = groups
+    sim.entity_index.clear()
+    for e in sim.players + sim.bots:
+        if e.alive:
+            sim.entity_index.add(e, e.x, e.y)
+    # bombs, explosions and power-ups, with their timers in the original order
+    sim._bombs.clear()
+    sim._bomb_timers = []
+    seq = 0
+    for _ in range(n_bombs):
+        x, y, owner, explode_at, power = _BOMB.unpack_from(data, pos)
+        pos += _BOMB.size
+        b = Bomb(x=x, y=y, owner=by_id[owner], explode_at=explode_at, power=power)
+        sim._bombs[id(b)] = b
+        seq += 1
+        sim._bomb_timers.append((explode_at, seq, b))
+        m.set_bomb(x, y, b)
+    sim._explosions.clear()
+    sim._explosion_timers = []
+    for _ in range(n_exps):
+        end_at, cnt = _EXP.unpack_from(data, pos)
+        pos += _EXP.size
+        coords = array('h')
+        coords.frombytes(data[pos:pos + 4*cnt])
+        pos += 4*cnt
+        exp = Explosion(positions=set(zip(coords[0::2], coords[1::2])), end_at=end_at)
+        sim._explosions[id(exp)] = exp
+        seq += 1
+        sim._explosion_timers.append((end_at, seq, exp))
+    heapq.heapify(sim._bomb_timers)
+    heapq.heapify(sim._explosion_timers)
+    sim._timer_seq = seq
+    sim._powerups.clear()
+    sim.powerup_index.clear()
+    for _ in range(n_pus):
+        x, y, t = _PU.unpack_from(data, pos)
+        pos += _PU.size
+        pu = PowerUp(x=x, y=y, type=config.POWERUP_TYPES[t])
+        sim._powerups[id(pu)] = pu
+        sim.powerup_index.add(pu, x, y)
+    if pos != len(data):
+        raise ValueError(f"snapshot has {len(data) - pos} trailing bytes")
+    _rebuild_derived(sim, max(map_version, old_version + 1) if old_version else map_version)
+    # observers redraw everything
+    if m.listeners:
+        for y in range(h):
+            for x in range(w):
+                m._notify(x, y)
+    for e in sim.players + sim.bots:
+        for fn in sim.move_listeners:
+            fn(e)
+
+def from_snapshot(data:bytes) -> Simulation:
+    """New `Simulation` holding the state in `data`."""
+    magic, version, flags, w, h = _HEAD.unpack_from(data)[:5]
+    sim = Simulation.__new__(Simulation)
+    sim._init_state(GameMap(w, h, generate=False), None, 0, 0, 0)
+    restore(sim, data)
+    return sim
+
+def clone(sim:Simulation) -> Simulation:
+    """Independent copy of `sim` for lookahead; listeners and caches are not copied."""
+    m = sim.map
+    gm = GameMap(m.w, m.h, generate=False)
+    gm.tiles[:] = m.tiles
+    gm.explosion[:] = m.explosion
+    gm.walk[:] = m.walk
+    gm.soft_cells = set(m.soft_cells)
+    c = Simulation.__new__(Simulation)
+    c._init_state(gm, sim.map_seed, sim.seed, sim.bot_count, sim.player_count)
+    c.rng.setstate(sim.rng.getstate())
+    c.now, c.ticks, c.next_id, c.soft_destroyed = sim.now, sim.ticks, sim.next_id, sim.soft_destroyed
+    c.last_powerup_icon = sim.last_powerup_icon
+    c.inputs = [PlayerInput(i.dx, i.dy, i.bomb) for i in sim.inputs]
+    by_id = {}
+    for src, dst in ((sim.players, c.players), (sim.bots, c.bots)):
+        for e in src:
+            e2 = copy.copy(e)
+            if isinstance(e2, Computer):
+                e2.path = list(e.path)
+            by_id[e.id] = e2
+            dst.append(e2)
+            if e2.alive:
+                c.entity_index.add(e2, e2.x, e2.y)
+    seq = 0
+    for b in sim.bombs:
+        b2 = Bomb(x=b.x, y=b.y, owner=by_id[b.owner.id], explode_at=b.explode_at, power=b.power)
+        c._bombs[id(b2)] = b2
+        seq += 1
+        c._bomb_timers.append((b2.explode_at, seq, b2))
+        gm.set_bomb(b2.x, b2.y, b2)
+    for exp in sim.explosions:
+        e2 = Explosion(positions=set(exp.positions), end_at=exp.end_at)
+        c._explosions[id(e2)] = e2
+        seq += 1
+        c._explosion_timers.append((e2.end_at, seq, e2))
+    heapq.heapify(c._bomb_timers)
+    heapq.heapify(c._explosion_timers)
+    c._timer_seq = seq
+    for pu in sim.powerups:
+        pu2 = PowerUp(x=pu.x, y=pu.y, type=pu.type)
+        c._powerups[id(pu2)] = pu2
+        c.powerup_index.add(pu2, pu2.x, pu2.y)
+    _rebuild_derived(c, m.version)
+    return c
+
+def _soft_cells(tiles:bytearray) -> set:
+    return set(compress(range(len(tiles)), tiles.translate(_SOFT)))
+
+def _rebuild_derived(sim:Simulation, map_version:int):
+    m = sim.map
+    # never move the version backwards: caches keyed on it would look fresh
+    m.version = map_version
+    m._changes.clear()
+    sim.danger.rebuild(sim.bombs)
+    sim.bomb_index.clear()
+    for b in sim.bombs:
+        sim.bomb_index.add(b, b.x, b.y)
+    sim.explosion_index.clear()
+    for exp in sim.explosions:
+        for (x, y) in exp.positions:
+            sim.explosion_index.add(exp, x, y)
+    sim._fields.clear()
+    sim._fields_version = -1
+    sim.path_cache.clear()
+    sim.scheduler.clear()
+
+def _bench(fn, repeat:int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1e6 / repeat
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compare snapshot/clone against copy.deepcopy and pickle.")
+    ap.add_argument("--ticks", type=int, default=400, help="ticks to play before measuring (more bombs/walls destroyed)")
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--map-w", type=int, default=config.MAP_W)
+    ap.add_argument("--map-h", type=int, default=config.MAP_H)
+    ap.add_argument("--bots", type=int, default=config.BOT_COUNT)
+    args = ap.parse_args(argv)
+
+    sim = Simulation(args.map_w, args.map_h, bot_count=args.bots, seed=args.seed, player_count=1)
+    while sim.ticks < args.ticks and not sim.is_over():
+        sim.step(config.TICK_MS)
+    data = snapshot(sim)
+    pickled = pickle.dumps(sim, pickle.HIGHEST_PROTOCOL)
+    rows = [
+        ("snapshot", _bench(lambda: snapshot(sim), args.repeat), len(data)),
+        ("from_snapshot", _bench(lambda: from_snapshot(data), args.repeat), None),
+        ("clone", _bench(lambda: clone(sim), args.repeat), None),
+        ("pickle.dumps", _bench(lambda: pickle.dumps(sim, pickle.HIGHEST_PROTOCOL), args.repeat), len(pickled)),
+        ("pickle.loads", _bench(lambda: pickle.loads(pickled), args.repeat), None),
+        ("copy.deepcopy", _bench(lambda: copy.deepcopy(sim), args.repeat), None),
+    ]
+    print(f"{args.map_w}x{args.map_h}, {len(sim.bots)} bots, tick {sim.ticks}: "
+          f"{len(sim._bombs)} bombs, {len(sim._explosions)} explosions, {len(sim._powerups)} power-ups")
+    for name, us, size in rows:
+        print(f"{name:<14} {us:10.1f} us" + (f"  {size} bytes" if size is not None else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Tile-keyed spatial hash for objects that live on map cells.
+
+Buckets are keyed by `y*w + x`, so "what is on this tile" costs O(objects on
+the tile) instead of a scan over every object, and "what is in this
+rectangle" costs O(tiles in it), or O(occupied tiles) when that is fewer.
+"""
+from typing import Dict, List, Tuple
+
+class SpatialIndex:
+    def __init__(self, w:int):
+        self.w = w
+        self._cells: Dict[int, List[object]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, obj:object, x:int, y:int):
+        self._cells.setdefault(y*self.w + x, []).append(obj)
+        self._count += 1
+
+    def remove(self, obj:object, x:int, y:int) -> bool:
+        i = y*self.w + x
+        bucket = self._cells.get(i)
+        if not bucket:
+            return False
+        for k, o in enumerate(bucket):
+            if o is obj:
+                del bucket[k]
+                if not bucket:
+                    del self._cells[i]
+                self._count -= 1
+                return True
+        return False
+
+    def move(self, obj:object, ox:int, oy:int, nx:int, ny:int):
+        if self.remove(obj, ox, oy):
+            self.add(obj, nx, ny)
+
+    def at(self, x:int, y:int) -> Tuple[object, ...]:
+        bucket = self._cells.get(y*self.w + x)
+        return tuple(bucket) if bucket else ()
+
+    def within(self, x0:int, y0:int, x1:int, y1:int) -> List[object]:
+        """Objects on tiles in [x0, x1) x [y0, y1), each once (an object on several tiles included)."""
+        w, cells = self.w, self._cells
+        if len(cells) < (x1 - x0) * (y1 - y0):
+            buckets = [b for i, b in cells.items() if x0 <= i % w < x1 and y0 <= i // w < y1]
+        else:
+            get = cells.get
+            buckets = [b for b in (get(i) for y in range(y0, y1) for i in range(y*w + x0, y*w + x1)) if b]
+        return list({id(o): o for b in buckets for o in b}.values())
+
+    def clear(self):
+        self._cells.clear()
+        self._count = 0